@@ -1,8 +1,11 @@
 from fastapi import APIRouter
 
-from app.api.api_v1.endpoints import items, login, users
+from app.api.api_v1.endpoints import debug, items, login, users
+from app.core.config import settings
 
 api_router = APIRouter()
 api_router.include_router(login.router, tags=["login"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
 api_router.include_router(items.router, prefix="/items", tags=["items"])
+if settings.PROFILER_ENABLED:
+    api_router.include_router(debug.router, prefix="/debug", tags=["debug"])
@@ -0,0 +1,28 @@
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from app import schemas
+from app.api import deps
+from app.core.config import settings
+from app.core.profiler import ProfilerBusy, profiler
+
+router = APIRouter()
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10, gt=0, le=settings.PROFILER_MAX_SECONDS),
+    interval_ms: Optional[float] = Query(None, ge=1, le=1000),
+    current_user: schemas.TokenUser = Depends(deps.get_superuser_token_user),
+) -> Any:
+    """
+    Sample the stacks of this worker for `seconds`, as collapsed stacks
+    (one `frame;frame;... count` line per distinct stack) for flamegraph tools.
+    """
+    interval = (interval_ms or settings.PROFILER_INTERVAL_MS) / 1000
+    try:
+        return await profiler.profile(seconds, interval)
+    except ProfilerBusy as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
@@ -1,32 +1,133 @@
-from typing import Any, List
+from typing import Any, Dict, List, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
-from odmantic import ObjectId
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from odmantic import AIOEngine, ObjectId
 from odmantic.session import AIOSession
 
 from app import crud, models, schemas
 from app.api import deps
+from app.api.counts import set_total_count
+from app.api.etags import (
+    item_etag,
+    item_versions,
+    none_match,
+    not_modified,
+    parse_item_etag,
+)
+from app.api.responses import item_serializer
+from app.crud.crud_item import VersionMismatch
+from app.utilities.export import MEDIA_TYPES, export_chunks
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.Item])
 async def read_items(
-    db: AIOSession = Depends(deps.get_db),
+    response: Response,
+    db: AIOEngine = Depends(deps.get_engine),
     skip: int = 0,
     limit: int = 100,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    cursor: Optional[str] = None,
+    total: bool = False,
+    current_user: schemas.TokenUser = Depends(deps.get_active_token_user),
 ) -> Any:
     """
     Retrieve items.
+
+    Pass `cursor` (empty for the first page) to page by keyset instead of
+    `skip`; the next page's cursor is returned in the `X-Next-Cursor` header.
+    With `total=true` the number of items (possibly a few seconds stale) is
+    returned in the `X-Total-Count` header.
     """
     if crud.user.is_superuser(current_user):
-        items = await crud.item.get_multi(db, skip=skip, limit=limit)
+        if total:
+            await set_total_count(response, ("item", None), lambda: crud.item.count(db))
+        items = await crud.item.get_multi_lean(
+            db, skip=skip, limit=limit, cursor=cursor
+        )
     else:
-        items = await crud.item.get_multi_by_owner(
-            db=db, owner_id=current_user.id, skip=skip, limit=limit
+        if total:
+            await set_total_count(
+                response,
+                ("item", current_user.id),
+                lambda: crud.item.count_by_owner(db, owner_id=current_user.id),
+            )
+        items = await crud.item.get_multi_by_owner_lean(
+            db=db,
+            owner_id=current_user.id,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
         )
-    return items
+    # skip pages are in natural order: only keyset pages have a next cursor
+    if cursor is not None and (
+        next_cursor := crud.item.next_cursor(items, limit=limit)
+    ):
+        response.headers["X-Next-Cursor"] = next_cursor
+    return item_serializer.response(items, response=response)
+
+
+_EXPORT_FIELDS = ("id", "title", "description", "owner_id")
+
+
+def _export_row(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": str(doc["_id"]),
+        "title": doc["title"],
+        "description": doc.get("description"),
+        "owner_id": str(doc["owner"]),
+    }
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_items(
+    db: AIOEngine = Depends(deps.get_engine),
+    format: Literal["ndjson", "csv"] = "ndjson",
+    batch_size: int = Query(1000, ge=1, le=10_000),
+    current_user: schemas.TokenUser = Depends(deps.get_active_token_user),
+) -> Any:
+    """
+    Stream all (own) items as NDJSON or CSV, in constant memory.
+    """
+    queries = []
+    if not crud.user.is_superuser(current_user):
+        queries.append(models.Item.owner == current_user.id)
+    docs = crud.item.stream(
+        db,
+        *queries,
+        projection={"title": 1, "description": 1, "owner": 1},
+        batch_size=batch_size,
+    )
+    return StreamingResponse(
+        export_chunks(format, docs, _export_row, _EXPORT_FIELDS, batch_size),
+        media_type=MEDIA_TYPES[format],
+    )
+
+
+@router.get("/search", response_model=List[schemas.Item])
+async def search_items(
+    response: Response,
+    db: AIOEngine = Depends(deps.get_engine),
+    q: str = Query(..., min_length=1, max_length=256),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: schemas.TokenUser = Depends(deps.get_active_token_user),
+) -> Any:
+    """
+    Search items by title and description, most relevant first.
+
+    `q` follows MongoDB text search syntax: words, `"exact phrases"` and
+    `-excluded` words. The next page's cursor is returned in the
+    `X-Next-Cursor` header.
+    """
+    owner_id = None if crud.user.is_superuser(current_user) else current_user.id
+    items, next_cursor = await crud.item.search(
+        db, q=q, owner_id=owner_id, limit=limit, cursor=cursor
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return item_serializer.response(items, response=response)
 
 
 @router.post("/", response_model=schemas.Item)
@@ -43,41 +144,121 @@ async def create_item(
     return item
 
 
+@router.post("/bulk", response_model=schemas.BulkResult)
+async def create_items_bulk(
+    *,
+    db: AIOSession = Depends(deps.get_db),
+    bulk_in: schemas.ItemBulkCreate,
+    current_user: schemas.TokenUser = Depends(deps.get_active_token_user),
+) -> Any:
+    """
+    Create many items at once; the outcome is reported per element.
+    """
+    results = await crud.item.create_many_with_owner(
+        db=db, objs_in=bulk_in.items, owner_id=current_user.id
+    )
+    return _bulk_result(results)
+
+
+@router.delete("/bulk", response_model=schemas.BulkResult)
+async def delete_items_bulk(
+    *,
+    db: AIOSession = Depends(deps.get_db),
+    bulk_in: schemas.ItemBulkDelete,
+    current_user: schemas.TokenUser = Depends(deps.get_active_token_user),
+) -> Any:
+    """
+    Delete many items at once; the outcome is reported per element.
+    """
+    owner_id = None if crud.user.is_superuser(current_user) else current_user.id
+    results = await crud.item.remove_many_owned(
+        db=db, ids=bulk_in.ids, owner_id=owner_id
+    )
+    for result in results:
+        if result.ok:
+            item_versions.pop(bulk_in.ids[result.index])
+    return _bulk_result(results)
+
+
+def _bulk_result(results: List[schemas.BulkItemResult]) -> schemas.BulkResult:
+    succeeded = sum(result.ok for result in results)
+    return schemas.BulkResult(
+        succeeded=succeeded, failed=len(results) - succeeded, results=results
+    )
+
+
 @router.put("/{id}", response_model=schemas.Item)
 async def update_item(
     *,
     db: AIOSession = Depends(deps.get_db),
     id: ObjectId,
     item_in: schemas.ItemUpdate,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    current_user: schemas.TokenUser = Depends(deps.get_active_token_user),
 ) -> Any:
     """
     Update an item.
+
+    With `If-Match: <ETag>` the update only applies to that version of the
+    item (412 otherwise).
     """
-    if not (item := await crud.item.get(db=db, id=id)):
+    owner_id = None if crud.user.is_superuser(current_user) else current_user.id
+    version = None
+    if if_match is not None and if_match.strip() != "*":
+        version = parse_item_etag(if_match.strip(), id)
+        if version is None:
+            raise HTTPException(status_code=412, detail="Precondition failed")
+    try:
+        item = await crud.item.update_owned(
+            db=db, id=id, obj_in=item_in, owner_id=owner_id, version=version
+        )
+    except LookupError:
         raise HTTPException(status_code=404, detail="Item not found")
-    if not crud.user.is_superuser(current_user) and (item.owner.id != current_user.id):
+    except PermissionError:
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    item = await crud.item.update(db=db, db_obj=item, obj_in=item_in)
+    except VersionMismatch:
+        raise HTTPException(status_code=412, detail="Precondition failed")
+    item_versions.set(id, (item.version, item.owner_id))
+    response.headers["ETag"] = item_etag(id, item.version)
     return item
 
 
 @router.get("/{id}", response_model=schemas.Item)
 async def read_item(
     *,
-    db: AIOSession = Depends(deps.get_db),
+    db: AIOEngine = Depends(deps.get_engine),
     id: ObjectId,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    if_none_match: Optional[str] = Header(None),
+    current_user: schemas.TokenUser = Depends(deps.get_active_token_user),
 ) -> Any:
     """
     Get item by ID.
+
+    Responses carry an `ETag`; send it back in `If-None-Match` to get a 304
+    while the item is unchanged.
     """
-    if not (item := await crud.item.get(db=db, id=id)):
+    is_superuser = crud.user.is_superuser(current_user)
+    if if_none_match and (cached := item_versions.get(id)) is not None:
+        version, owner_id = cached
+        etag = item_etag(id, version)
+        if (is_superuser or owner_id == str(current_user.id)) and none_match(
+            if_none_match, etag
+        ):
+            return not_modified(etag)
+
+    if not (item := await crud.item.get_lean(db=db, id=id)):
         raise HTTPException(status_code=404, detail="Item not found")
 
-    if not crud.user.is_superuser(current_user) and (item.owner.id != current_user.id):
+    if not is_superuser and (item.owner_id != str(current_user.id)):
         raise HTTPException(status_code=400, detail="Not enough permissions")
-    return item
+    item_versions.set(id, (item.version, item.owner_id))
+    etag = item_etag(id, item.version)
+    if none_match(if_none_match, etag):
+        return not_modified(etag)
+    response = item_serializer.response(item)
+    response.headers["ETag"] = etag
+    return response
 
 
 @router.delete("/{id}", response_model=schemas.Item)
@@ -85,15 +266,17 @@ async def delete_item(
     *,
     db: AIOSession = Depends(deps.get_db),
     id: ObjectId,
-    current_user: models.User = Depends(deps.get_current_active_user),
+    current_user: schemas.TokenUser = Depends(deps.get_active_token_user),
 ) -> Any:
     """
     Delete an item.
     """
-    if not (item := await crud.item.get(db=db, id=id)):
+    owner_id = None if crud.user.is_superuser(current_user) else current_user.id
+    try:
+        item = await crud.item.remove_owned(db=db, id=id, owner_id=owner_id)
+    except LookupError:
         raise HTTPException(status_code=404, detail="Item not found")
-    if not crud.user.is_superuser(current_user) and (item.owner.id != current_user.id):
+    except PermissionError:
         raise HTTPException(status_code=400, detail="Not enough permissions")
-
-    item = await crud.item.remove(db=db, id=id)
+    item_versions.pop(id)
     return item
@@ -1,8 +1,9 @@
 from datetime import timedelta
-from typing import Any
+from typing import Any, Dict
 
 from fastapi import APIRouter, Body, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
+from odmantic import AIOEngine
 from odmantic.session import AIOSession
 
 from app import crud, models, schemas
@@ -13,7 +14,11 @@ from app.core.config import settings
 router = APIRouter()
 
 
-@router.post("/login/access-token", response_model=schemas.Token)
+@router.post(
+    "/login/access-token",
+    response_model=schemas.Token,
+    dependencies=[Depends(deps.login_rate_limit)],
+)
 async def login_access_token(
     db: AIOSession = Depends(deps.get_db),
     form_data: OAuth2PasswordRequestForm = Depends(),
@@ -28,10 +33,51 @@ async def login_access_token(
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not crud.user.is_active(user):
         raise HTTPException(status_code=400, detail="Inactive user")
+    return {
+        **_access_token(user),
+        "refresh_token": security.create_refresh_token(user.id, user.token_version),
+    }
+
+
+@router.post("/login/refresh-token", response_model=schemas.Token)
+async def login_refresh_token(
+    db: AIOEngine = Depends(deps.get_engine),
+    token_in: schemas.RefreshToken = Body(...),
+) -> Any:
+    """
+    Get a new access token for a refresh token
+    """
+    token_data = deps.decode_token(token_in.refresh_token, type="refresh")
+    user = await crud.user.get(db, id=token_data.sub)
+    if not user or token_data.ver != user.token_version:
+        raise HTTPException(status_code=403, detail="Could not validate credentials")
+    elif not crud.user.is_active(user):
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return {**_access_token(user), "refresh_token": token_in.refresh_token}
+
+
+@router.post("/login/revoke-tokens", response_model=schemas.Msg)
+async def revoke_tokens(
+    db: AIOSession = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user),
+) -> Any:
+    """
+    Invalidate every access and refresh token issued to the current user
+    """
+    await crud.user.revoke_tokens(db, db_obj=current_user)
+    return {"msg": "Tokens revoked"}
+
+
+def _access_token(user: models.User) -> Dict[str, str]:
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    claims = {
+        "ver": user.token_version,
+        "is_active": crud.user.is_active(user),
+        "is_superuser": crud.user.is_superuser(user),
+    }
     return {
         "access_token": security.create_access_token(
-            user.id, expires_delta=access_token_expires
+            user.id, expires_delta=access_token_expires, claims=claims
         ),
         "token_type": "bearer",
     }
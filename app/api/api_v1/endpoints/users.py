@@ -1,29 +1,81 @@
-from typing import Any, List
+from typing import Any, Dict, List, Literal, Optional
 
-from fastapi import APIRouter, Body, Depends, HTTPException
-from fastapi.encoders import jsonable_encoder
-from odmantic import ObjectId
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from odmantic import AIOEngine, ObjectId
 from odmantic.session import AIOSession
 
 from app import crud, models, schemas
 from app.api import deps
+from app.api.counts import set_total_count
+from app.api.etags import content_etag, none_match, not_modified
+from app.api.responses import dumps, user_serializer
 from app.core.config import settings
+from app.core.tracing import span
+from app.utilities.export import MEDIA_TYPES, export_chunks
 
 router = APIRouter()
 
 
 @router.get("/", response_model=List[schemas.User])
 async def read_users(
-    db: AIOSession = Depends(deps.get_db),
+    response: Response,
+    db: AIOEngine = Depends(deps.get_engine),
     skip: int = 0,
     limit: int = 100,
-    current_user: models.User = Depends(deps.get_current_active_superuser),
+    cursor: Optional[str] = None,
+    total: bool = False,
+    current_user: schemas.TokenUser = Depends(deps.get_superuser_token_user),
 ) -> Any:
     """
     Retrieve users.
+
+    Pass `cursor` (empty for the first page) to page by keyset instead of
+    `skip`; the next page's cursor is returned in the `X-Next-Cursor` header.
+    With `total=true` the number of users (possibly a few seconds stale) is
+    returned in the `X-Total-Count` header.
+    """
+    if total:
+        await set_total_count(response, ("user", None), lambda: crud.user.count(db))
+    users = await crud.user.get_multi(db, skip=skip, limit=limit, cursor=cursor)
+    # skip pages are in natural order: only keyset pages have a next cursor
+    if cursor is not None and (
+        next_cursor := crud.user.next_cursor(users, limit=limit)
+    ):
+        response.headers["X-Next-Cursor"] = next_cursor
+    return user_serializer.response(users, response=response)
+
+
+_EXPORT_FIELDS = ("id", "email", "full_name", "is_active", "is_superuser")
+
+
+def _export_row(doc: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        "id": str(doc["_id"]),
+        "email": doc.get("email"),
+        "full_name": doc.get("full_name"),
+        "is_active": doc.get("is_active", True),
+        "is_superuser": doc.get("is_superuser", False),
+    }
+
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_users(
+    db: AIOEngine = Depends(deps.get_engine),
+    format: Literal["ndjson", "csv"] = "ndjson",
+    batch_size: int = Query(1000, ge=1, le=10_000),
+    current_user: schemas.TokenUser = Depends(deps.get_superuser_token_user),
+) -> Any:
+    """
+    Stream all users as NDJSON or CSV, in constant memory.
     """
-    users = await crud.user.get_multi(db, skip=skip, limit=limit)
-    return users
+    # project the exported fields only: never read password hashes
+    projection = {field: 1 for field in _EXPORT_FIELDS if field != "id"}
+    docs = crud.user.stream(db, projection=projection, batch_size=batch_size)
+    return StreamingResponse(
+        export_chunks(format, docs, _export_row, _EXPORT_FIELDS, batch_size),
+        media_type=MEDIA_TYPES[format],
+    )
 
 
 @router.post("/", response_model=schemas.User)
@@ -31,7 +83,7 @@ async def create_user(
     *,
     db: AIOSession = Depends(deps.get_db),
     user_in: schemas.UserCreate,
-    current_user: models.User = Depends(deps.get_current_active_superuser),
+    current_user: schemas.TokenUser = Depends(deps.get_superuser_token_user),
 ) -> Any:
     """
     Create new user.
@@ -60,27 +112,34 @@ async def update_user_me(
     """
     Update own user.
     """
-    current_user_data = jsonable_encoder(current_user)
-    user_in = schemas.UserUpdate(**current_user_data)
-    if password is not None:
-        user_in.password = password
-    if full_name is not None:
-        user_in.full_name = full_name
-    if email is not None:
-        user_in.email = email
+    # only the fields actually sent are set, so the password is re-hashed
+    # (and anything written) only when it changes
+    provided = {"password": password, "full_name": full_name, "email": email}
+    user_in = schemas.UserUpdate(
+        **{field: value for field, value in provided.items() if value is not None}
+    )
     user = await crud.user.update(db, db_obj=current_user, obj_in=user_in)
     return user
 
 
 @router.get("/me", response_model=schemas.User)
 async def read_user_me(
-    db: AIOSession = Depends(deps.get_db),
+    db: AIOEngine = Depends(deps.get_engine),
+    if_none_match: Optional[str] = Header(None),
     current_user: models.User = Depends(deps.get_current_active_user),
 ) -> Any:
     """
     Get current user.
+
+    Responses carry an `ETag`; send it back in `If-None-Match` to get a 304
+    while the user is unchanged.
     """
-    return current_user
+    with span("serialize"):
+        body = dumps(user_serializer.to_dict(current_user))
+    etag = content_etag(body)
+    if none_match(if_none_match, etag):
+        return not_modified(etag)
+    return Response(body, media_type="application/json", headers={"ETag": etag})
 
 
 @router.post("/open", response_model=schemas.User)
@@ -113,14 +172,14 @@ async def create_user_open(
 @router.get("/{user_id}", response_model=schemas.User)
 async def read_user_by_id(
     user_id: ObjectId,
-    current_user: models.User = Depends(deps.get_current_active_user),
-    db: AIOSession = Depends(deps.get_db),
+    current_user: schemas.TokenUser = Depends(deps.get_active_token_user),
+    db: AIOEngine = Depends(deps.get_engine),
 ) -> Any:
     """
     Get a specific user by id.
     """
     user = await crud.user.get(db, id=user_id)
-    if user == current_user:
+    if user and user.id == current_user.id:
         return user
     if not crud.user.is_superuser(current_user):
         raise HTTPException(
@@ -129,13 +188,29 @@ async def read_user_by_id(
     return user
 
 
+@router.get("/{user_id}/stats", response_model=schemas.ItemStats)
+async def read_user_stats(
+    user_id: ObjectId,
+    current_user: schemas.TokenUser = Depends(deps.get_active_token_user),
+    db: AIOEngine = Depends(deps.get_engine),
+) -> Any:
+    """
+    Get the item statistics of a user: item count, last creation and removal.
+    """
+    if user_id != current_user.id and not crud.user.is_superuser(current_user):
+        raise HTTPException(
+            status_code=400, detail="The user doesn't have enough privileges"
+        )
+    return await crud.item_stats.get_by_owner(db, owner_id=user_id)
+
+
 @router.put("/{user_id}", response_model=schemas.User)
 async def update_user(
     *,
     db: AIOSession = Depends(deps.get_db),
     user_id: ObjectId,
     user_in: schemas.UserUpdate,
-    current_user: models.User = Depends(deps.get_current_active_superuser),
+    current_user: schemas.TokenUser = Depends(deps.get_superuser_token_user),
 ) -> Any:
     """
     Update a user.
@@ -0,0 +1,26 @@
+"""``X-Total-Count`` of list endpoints.
+
+Totals are cached per list for ``COUNT_CACHE_TTL_SECONDS`` in each worker:
+they may lag behind writes by that much, in exchange for at most one count
+per list and TTL whatever the request rate.
+"""
+from typing import Awaitable, Callable, Hashable
+
+from fastapi import Response
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+# (collection, owner id or None) -> total
+total_counts: TTLCache[Hashable, int] = TTLCache(
+    maxsize=settings.COUNT_CACHE_MAX_SIZE, ttl=settings.COUNT_CACHE_TTL_SECONDS
+)
+
+
+async def set_total_count(
+    response: Response, key: Hashable, count: Callable[[], Awaitable[int]]
+) -> None:
+    if (total := total_counts.get(key)) is None:
+        total = await count()
+        total_counts.set(key, total)
+    response.headers["X-Total-Count"] = str(total)
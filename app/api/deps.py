@@ -1,15 +1,15 @@
 from typing import AsyncGenerator
 
-from fastapi import Depends, HTTPException, status
-from fastapi.security import OAuth2PasswordBearer
-from jose import jwt
-from odmantic.session import AIOSession
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
+from odmantic import AIOEngine
 from pydantic import ValidationError
 
 from app import crud, models, schemas
 from app.core import security
 from app.core.config import settings
-from app.db.session import engine
+from app.core.tracing import span
+from app.db import session as db_session
 from app.utilities.logging import get_logger
 
 logger = get_logger(__name__)
@@ -19,28 +19,61 @@ reusable_oauth2 = OAuth2PasswordBearer(
 )
 
 
+# Endpoints pick how they talk to MongoDB:
+# - get_db: a client session, for writes and sequences needing causal ordering
+# - get_engine: no server session at all, for plain reads
+# - get_transaction: a transaction, committed when the endpoint succeeds
+#   (needs a replica set)
+
+
 async def get_db() -> AsyncGenerator:
-    async with engine.session() as session:
+    async with db_session.get_engine().session() as session:
         yield session
 
 
-async def get_current_user(
-    db: AIOSession = Depends(get_db), token: str = Depends(reusable_oauth2)
-) -> models.User:
+def get_engine() -> AIOEngine:
+    return db_session.get_engine()
+
+
+async def get_transaction() -> AsyncGenerator:
+    async with db_session.get_engine().session() as session:
+        async with session.transaction() as transaction:
+            yield transaction
+
+
+def _credentials_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="Could not validate credentials",
+    )
+
+
+def decode_token(token: str, *, type: str = "access") -> schemas.TokenPayload:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        token_data = schemas.TokenPayload(**payload)
-    except (jwt.JWTError, ValidationError) as exc:
+        payload = schemas.TokenPayload(**security.decode_access_token(token))
+    except (security.InvalidToken, ValidationError) as exc:
         logger.error(exc)
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Could not validate credentials",
-        ) from exc
-    if not (user := await crud.user.get(db, id=token_data.sub)):
-        raise HTTPException(status_code=404, detail="User not found")
-    return user
+        raise _credentials_error() from exc
+    # tokens issued before the type claim existed are access tokens
+    if (payload.type or "access") != type:
+        raise _credentials_error()
+    return payload
+
+
+async def get_current_user(
+    db: AIOEngine = Depends(get_engine), token: str = Depends(reusable_oauth2)
+) -> models.User:
+    """The user document, for endpoints that need more than the token claims."""
+    with span("auth"):
+        if (principal := security.principal_cache.get(token)) is not None:
+            return principal.user
+        token_data = decode_token(token)
+        if not (user := await crud.user.get(db, id=token_data.sub)):
+            raise HTTPException(status_code=404, detail="User not found")
+        if token_data.ver is not None and token_data.ver != user.token_version:
+            raise _credentials_error()
+        security.principal_cache.put(token, token_data.dict(), user)
+        return user
 
 
 async def get_current_active_user(
@@ -59,3 +92,52 @@ async def get_current_active_superuser(
             status_code=400, detail="The user doesn't have enough privileges"
         )
     return current_user
+
+
+async def get_token_user(
+    db: AIOEngine = Depends(get_engine), token: str = Depends(reusable_oauth2)
+) -> schemas.TokenUser:
+    """The user as described by the access token: no lookup unless the token
+    predates the embedded claims."""
+    with span("auth"):
+        token_data = decode_token(token)
+        if token_data.ver is not None:
+            if security.is_revoked(token_data.sub, token_data.ver):
+                raise _credentials_error()
+            return schemas.TokenUser(
+                id=token_data.sub,
+                is_active=token_data.is_active,
+                is_superuser=token_data.is_superuser,
+            )
+    user = await get_current_user(db, token)
+    return schemas.TokenUser(
+        id=user.id, is_active=user.is_active, is_superuser=user.is_superuser
+    )
+
+
+async def get_active_token_user(
+    current_user: schemas.TokenUser = Depends(get_token_user),
+) -> schemas.TokenUser:
+    if not current_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+
+async def get_superuser_token_user(
+    current_user: schemas.TokenUser = Depends(get_token_user),
+) -> schemas.TokenUser:
+    if not current_user.is_superuser:
+        raise HTTPException(
+            status_code=400, detail="The user doesn't have enough privileges"
+        )
+    return current_user
+
+
+async def login_rate_limit(
+    request: Request, form_data: OAuth2PasswordRequestForm = Depends()
+) -> None:
+    # request.client is the peer: run uvicorn with --proxy-headers (and
+    # --forwarded-allow-ips) behind a proxy so it is the real client
+    if request.client:
+        security.rate_limits.acquire("login:ip", request.client.host)
+    security.rate_limits.acquire("login:username", form_data.username.strip().lower())
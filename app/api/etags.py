@@ -0,0 +1,52 @@
+"""Strong ETags and conditional requests.
+
+Items are tagged with their ``version`` (bumped by every update), users
+with a hash of their response body. ``item_versions`` remembers the version
+and owner of recently read or written items so that a matching
+``If-None-Match`` is answered without reading the item: entries live
+``ETAG_CACHE_TTL_SECONDS``, which bounds how long another worker's update
+can go unnoticed.
+"""
+import hashlib
+from typing import Any, Optional, Tuple
+
+from fastapi import Response
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+# item id -> (version, owner id)
+item_versions: TTLCache[Any, Tuple[int, str]] = TTLCache(
+    maxsize=settings.ETAG_CACHE_MAX_SIZE, ttl=settings.ETAG_CACHE_TTL_SECONDS
+)
+
+
+def item_etag(id: Any, version: int) -> str:
+    return f'"{id}-{version}"'
+
+
+def parse_item_etag(etag: str, id: Any) -> Optional[int]:
+    """The version in an item ETag, None if it is not an ETag of item ``id``."""
+    prefix = f'"{id}-'
+    if not (etag.startswith(prefix) and etag.endswith('"')):
+        return None
+    version = etag[len(prefix) : -1]
+    return int(version) if version.isdigit() else None
+
+
+def content_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def none_match(if_none_match: Optional[str], etag: str) -> bool:
+    """True when ``If-None-Match`` lists ``etag`` (weak comparison, RFC 7232)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag})
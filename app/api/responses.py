@@ -0,0 +1,131 @@
+"""Opt-in fast response path.
+
+Returning a ``Response`` from an endpoint makes FastAPI skip the
+``response_model`` round-trip (``from_orm`` validation of every object, then
+``jsonable_encoder``, then stdlib ``json``). ``ModelSerializer`` instead reads
+the attributes the response schema declares through getters compiled once at
+import time, and ``FastJSONResponse`` encodes them with orjson. The output has
+the same keys, in the same order, as the schema it mirrors; endpoints keep
+``response_model`` for the OpenAPI documentation.
+"""
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence, Type, Union
+
+from fastapi import Response
+from odmantic import ObjectId
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+from app import schemas
+from app.core.tracing import span
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+Getter = Callable[[Any], Any]
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, BaseModel):
+        return obj.dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        allow_nan=False,
+        separators=(",", ":"),
+        default=_default,
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class ModelSerializer:
+    """Serialize objects with the shape of ``schema`` without validating them.
+
+    Every exported field of ``schema`` is read with ``getattr`` (falling back to
+    the field default, like ``orm_mode``), unless a custom getter is given;
+    ``converters`` post-process values the way the schema validators would.
+    """
+
+    def __init__(
+        self,
+        schema: Type[BaseModel],
+        *,
+        getters: Optional[Dict[str, Getter]] = None,
+        converters: Optional[Dict[str, Getter]] = None,
+    ):
+        getters, converters = getters or {}, converters or {}
+        fields = [
+            field
+            for field in schema.__fields__.values()
+            if not field.field_info.exclude
+        ]
+        unknown = (set(getters) | set(converters)) - {f.name for f in fields}
+        if unknown:
+            raise ValueError(f"{schema.__name__} does not export {sorted(unknown)}")
+        self.schema = schema
+        self._fields = tuple(
+            (
+                field.name,
+                getters.get(field.name) or self._attr_getter(field.name, field.default),
+                converters.get(field.name),
+            )
+            for field in fields
+        )
+
+    @staticmethod
+    def _attr_getter(name: str, default: Any) -> Getter:
+        return lambda obj: getattr(obj, name, default)
+
+    def to_dict(self, obj: Any) -> Dict[str, Any]:
+        row = {}
+        for name, getter, converter in self._fields:
+            value = getter(obj)
+            row[name] = converter(value) if converter is not None else value
+        return row
+
+    def response(
+        self,
+        content: Union[Any, Sequence[Any]],
+        *,
+        response: Optional[Response] = None,
+        status_code: int = 200,
+    ) -> FastJSONResponse:
+        """Build the response; headers set on the injected ``response`` are kept."""
+        with span("serialize"):
+            if isinstance(content, (list, tuple)):
+                body: Union[Dict[str, Any], List[Dict[str, Any]]] = [
+                    self.to_dict(obj) for obj in content
+                ]
+            else:
+                body = self.to_dict(content)
+            fast = FastJSONResponse(body, status_code=status_code)
+        if response is not None:
+            fast.headers.raw.extend(response.headers.raw)
+        return fast
+
+
+def _owner_id(item: Any) -> str:
+    # lean reads carry owner_id, full odmantic items the resolved owner
+    if owner_id := getattr(item, "owner_id", None):
+        return owner_id
+    return str(item.owner.id)
+
+
+item_serializer = ModelSerializer(
+    schemas.Item, getters={"owner_id": _owner_id}, converters={"id": str}
+)
+user_serializer = ModelSerializer(schemas.User, converters={"id": str})
@@ -0,0 +1,126 @@
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, NamedTuple, Optional, Set, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """In-process LRU cache whose entries also expire after ``ttl`` seconds.
+
+    Not thread safe: it is meant to be used from the event loop only.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[K, tuple[float, V]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: K) -> Optional[V]:
+        if (entry := self._data.get(key)) is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        if key in self._data:
+            self._remove(key)
+        self._data[key] = (time.monotonic() + ttl, value)
+        while len(self._data) > self.maxsize:
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def pop(self, key: K) -> None:
+        if key in self._data:
+            self._remove(key)
+
+    def clear(self) -> None:
+        for key in list(self._data):
+            self._remove(key)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._data),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _remove(self, key: K) -> None:
+        del self._data[key]
+
+
+class Principal(NamedTuple):
+    payload: Dict[str, Any]
+    # the user document (app.models.User), kept untyped so core needs no models
+    user: Any
+
+
+class PrincipalCache(TTLCache[str, Principal]):
+    """Authenticated principals keyed by access token.
+
+    Keeps a reverse index ``user id -> tokens`` so every cached token of a user
+    can be dropped when the user changes (update, deactivation, removal).
+    The cache is per process: an invalidation only reaches the worker that
+    handled the write, the other workers may serve the old user for up to
+    ``ttl`` seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        super().__init__(maxsize, ttl)
+        self._tokens_by_user: Dict[Any, Set[str]] = {}
+        self.invalidations = 0
+
+    def get(self, key: str) -> Optional[Principal]:
+        if (principal := super().get(key)) is None:
+            return None
+        # hand out a copy: endpoints may mutate ``current_user`` before saving it
+        user = principal.user.copy()
+        object.__setattr__(user, "__fields_modified__", set())
+        return Principal(principal.payload, user)
+
+    def put(self, token: str, payload: Dict[str, Any], user: Any) -> None:
+        ttl = self.ttl
+        if (exp := payload.get("exp")) is not None:
+            # never outlive the token itself
+            ttl = min(ttl, float(exp) - time.time())
+        snapshot = user.copy()
+        object.__setattr__(snapshot, "__fields_modified__", set())
+        self.set(token, Principal(payload, snapshot), ttl=ttl)
+        if token in self._data:
+            self._tokens_by_user.setdefault(user.id, set()).add(token)
+
+    def invalidate_user(self, user_id: Any) -> None:
+        for token in self._tokens_by_user.get(user_id, set()).copy():
+            self._remove(token)
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        return {**super().stats(), "invalidations": self.invalidations}
+
+    def _remove(self, key: str) -> None:
+        _, principal = self._data[key]
+        super()._remove(key)
+        tokens = self._tokens_by_user.get(principal.user.id)
+        if tokens is not None:
+            tokens.discard(key)
+            if not tokens:
+                del self._tokens_by_user[principal.user.id]
@@ -0,0 +1,117 @@
+import asyncio
+from dataclasses import dataclass
+from typing import (
+    Awaitable,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    List,
+    Mapping,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+K = TypeVar("K", bound=Hashable)
+T = TypeVar("T")
+
+# (key, items) -> exceptions of the failed items, by index in ``items``
+FlushFn = Callable[[K, List[T]], Awaitable[Mapping[int, Exception]]]
+
+
+@dataclass(frozen=True)
+class CoalescerStats:
+    batches: int
+    items: int
+    largest_batch: int
+    pending: int
+
+
+class WriteCoalescer(Generic[K, T]):
+    """Group writes of concurrent requests into batches (group commit).
+
+    ``submit`` queues an item under ``key`` and waits for its batch: a batch
+    is flushed ``max_delay`` seconds after its first item, or as soon as it
+    holds ``max_batch`` items, by a single ``flush(key, items)`` call. Each
+    submitter gets back its own outcome: the exception ``flush`` reported
+    for its item, the exception ``flush`` raised for the whole batch, or
+    nothing on success. So a write costs at most ``max_delay`` more latency
+    and N concurrent writes one round-trip instead of N. Event loop only.
+    """
+
+    def __init__(self, flush: FlushFn[K, T], *, max_delay: float, max_batch: int):
+        if max_batch < 1:
+            raise ValueError("max_batch must be at least 1")
+        self._flush_fn = flush
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self._pending: Dict[K, List[Tuple[T, asyncio.Future]]] = {}
+        self._timers: Dict[K, asyncio.TimerHandle] = {}
+        # flushes in progress, referenced so they are not garbage collected
+        self._flushes: Set[asyncio.Task] = set()
+        self._batches = 0
+        self._items = 0
+        self._largest_batch = 0
+
+    async def submit(self, key: K, item: T) -> None:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        batch = self._pending.setdefault(key, [])
+        batch.append((item, future))
+        if len(batch) >= self.max_batch:
+            self._start_flush(key)
+        elif len(batch) == 1:
+            self._timers[key] = loop.call_later(self.max_delay, self._start_flush, key)
+        await future
+
+    async def flush_all(self) -> None:
+        """Flush every pending batch now and wait for all flushes."""
+        for key in list(self._pending):
+            self._start_flush(key)
+        if self._flushes:
+            await asyncio.gather(*self._flushes, return_exceptions=True)
+
+    def stats(self) -> CoalescerStats:
+        return CoalescerStats(
+            batches=self._batches,
+            items=self._items,
+            largest_batch=self._largest_batch,
+            pending=sum(len(batch) for batch in self._pending.values()),
+        )
+
+    def _start_flush(self, key: K) -> None:
+        if (timer := self._timers.pop(key, None)) is not None:
+            timer.cancel()
+        if not (batch := self._pending.pop(key, None)):
+            return
+        task = asyncio.create_task(self._flush(key, batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _flush(self, key: K, batch: List[Tuple[T, asyncio.Future]]) -> None:
+        self._batches += 1
+        self._items += len(batch)
+        self._largest_batch = max(self._largest_batch, len(batch))
+        try:
+            errors = await self._flush_fn(key, [item for item, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        except BaseException:
+            # cancelled (e.g. at shutdown): the writes may or may not have
+            # happened, but no submitter may wait forever
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
+            raise
+        for index, (_, future) in enumerate(batch):
+            # a submitter may be gone (client disconnected): its write stands
+            if future.done():
+                continue
+            if (error := errors.get(index)) is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(None)
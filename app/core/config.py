@@ -1,22 +1,38 @@
+import json
+import os
 import secrets
 from pathlib import Path
-from typing import Any, Dict, Optional, Union
+from typing import Any, Dict, Literal, Optional, Union
 
-from hydra import compose, initialize_config_dir
-from omegaconf import DictConfig
 from pydantic import BaseModel, BaseSettings, EmailStr, validator
 from pydantic.env_settings import SettingsSourceCallable
 
 _config_file_path = Path(__file__)
 proj_dir = _config_file_path.parent.parent.parent
 
+# path of a JSON snapshot of config.yaml (see write_snapshot); when set, the
+# snapshot replaces Hydra, which alone takes a few hundred ms to import
+SNAPSHOT_ENV = "SETTINGS_SNAPSHOT"
 
-def hydra_config_settings_source(settings: BaseSettings) -> Dict[str, Any]:  # noqa
+
+def config_settings_source(settings: BaseSettings) -> Dict[str, Any]:
+    if snapshot := os.environ.get(SNAPSHOT_ENV):
+        return json.loads(Path(snapshot).read_text())
+    return hydra_config_settings_source(settings)
+
+
+def hydra_config_settings_source(
+    settings: Optional[BaseSettings],
+) -> Dict[str, Any]:  # noqa
     # https://docs.pydantic.dev/usage/settings/#adding-sources
+    from hydra import compose, initialize_config_dir
+
     config_dir, config_name = str(proj_dir), "config.yaml"
     try:
-        initialize_config_dir(version_base=None, config_dir=config_dir)
-        _cfg = compose(config_name)
+        # the context manager clears Hydra's global state, so composing again
+        # (write_snapshot after Settings()) works
+        with initialize_config_dir(version_base=None, config_dir=config_dir):
+            _cfg = compose(config_name)
         return dictconfig_to_pydict(_cfg)
     except Exception as exc:
         raise ValueError(
@@ -32,6 +48,10 @@ def dictconfig_to_pydict(cfg) -> dict:
     there is bug when partial override config by environ variable.
     Convert dictconfig to python build-in dict to fix it.
     """
+    from omegaconf import DictConfig, ListConfig
+
+    if isinstance(cfg, ListConfig):
+        return [dictconfig_to_pydict(v) for v in cfg]
     if not isinstance(cfg, DictConfig):
         return cfg
     return {k: dictconfig_to_pydict(v) for k, v in cfg.items()}
@@ -44,6 +64,31 @@ class DBConf(BaseModel):
     database: str
     username: Optional[str] = None
     password: Optional[str] = None
+    # init_db always applies app.db.indexes; this also does it on app startup
+    ensure_indexes_on_startup: bool = False
+    # connection pool, per worker process
+    max_pool_size: int = 100
+    min_pool_size: int = 0
+    # ms an operation waits for a free connection; None waits until
+    # server_selection_timeout_ms / the operation's own timeout
+    wait_queue_timeout_ms: Optional[int] = None
+    server_selection_timeout_ms: int = 30_000
+    # wire compression in order of preference, e.g. ["zstd", "snappy"]
+    # (zstd and snappy need the zstandard / python-snappy packages)
+    compressors: list[str] = []
+
+    @property
+    def client_options(self) -> Dict[str, Any]:
+        options: Dict[str, Any] = {
+            "maxPoolSize": self.max_pool_size,
+            "minPoolSize": self.min_pool_size,
+            "serverSelectionTimeoutMS": self.server_selection_timeout_ms,
+        }
+        if self.wait_queue_timeout_ms is not None:
+            options["waitQueueTimeoutMS"] = self.wait_queue_timeout_ms
+        if self.compressors:
+            options["compressors"] = ",".join(self.compressors)
+        return options
 
     @property
     def uri(self) -> str:
@@ -53,9 +98,78 @@ class DBConf(BaseModel):
 
 class Settings(BaseSettings):
     API_V1_STR: str = "/api/v1"
+    # tracebacks in error responses and debug logging; never in production
+    DEBUG: bool = False
+    # production server (python -m app.server): gunicorn with uvicorn workers
+    BIND: str = "0.0.0.0:80"
+    # development server (python -m app.main): local only, unprivileged port
+    DEV_BIND: str = "127.0.0.1:8000"
+    # worker processes: WEB_CONCURRENCY if set, else WORKERS_PER_CORE times the
+    # CPUs allowed by affinity and the cgroup quota, at least 2, at most
+    # MAX_WORKERS
+    WEB_CONCURRENCY: Optional[int] = None
+    WORKERS_PER_CORE: float = 1
+    MAX_WORKERS: Optional[int] = None
+    # import the app in the master before forking: workers start faster and
+    # share its memory pages, but code changes need a full restart
+    PRELOAD_APP: bool = False
+    # seconds a silent worker lives before being killed, and seconds workers
+    # get to finish in-flight requests on restart/shutdown
+    WORKER_TIMEOUT: int = 60
+    GRACEFUL_TIMEOUT: int = 30
+    KEEPALIVE: int = 5
+    # recycle a worker after MAX_REQUESTS + random(0, MAX_REQUESTS_JITTER)
+    # requests, so workers do not all restart at once; 0 never recycles
+    MAX_REQUESTS: int = 10_000
+    MAX_REQUESTS_JITTER: int = 1_000
     SECRET_KEY: str = secrets.token_urlsafe(32)
+    # access tokens carry the user's flags, so they are trusted without a
+    # lookup for their whole (short) lifetime; refresh tokens renew them
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
     # 60 minutes * 24 hours * 8 days = 8 days
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # bcrypt hashing/verification runs in a bounded pool, off the event loop
+    PASSWORD_HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    # None: min(4, cpu count)
+    PASSWORD_HASH_WORKERS: Optional[int] = None
+    # jobs allowed to wait for a free worker before new ones are rejected (503)
+    PASSWORD_HASH_QUEUE_SIZE: int = 64
+    # /login/access-token attempts per client IP and per username, checked
+    # before any lookup or hashing: "<n>/<second|minute|hour>", "" for no limit
+    LOGIN_RATE_LIMIT_PER_IP: str = "20/minute"
+    LOGIN_RATE_LIMIT_PER_USERNAME: str = "5/minute"
+    # cache of authenticated principals, keyed by access token; per worker: a
+    # user change is only seen at once by the worker that wrote it, the others
+    # may serve the old user for up to AUTH_CACHE_TTL_SECONDS
+    AUTH_CACHE_ENABLED: bool = True
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_SIZE: int = 10_000
+    # POST/DELETE /items/bulk: max elements per request, elements per write
+    ITEMS_BULK_MAX_SIZE: int = 5_000
+    ITEMS_BULK_CHUNK_SIZE: int = 500
+    # POST /items/: inserts of concurrent requests are grouped into one
+    # insert_many, flushed after at most MAX_DELAY_MS or at MAX_BATCH items
+    ITEMS_WRITE_COALESCING: bool = False
+    ITEMS_COALESCE_MAX_DELAY_MS: float = 2
+    ITEMS_COALESCE_MAX_BATCH: int = 100
+    # item id -> version of recently served items, answers If-None-Match
+    # without a read; the TTL bounds how stale another worker's update can be
+    ETAG_CACHE_TTL_SECONDS: int = 5
+    ETAG_CACHE_MAX_SIZE: int = 10_000
+    # X-Total-Count of list endpoints, per list (and owner) and worker
+    COUNT_CACHE_TTL_SECONDS: int = 5
+    COUNT_CACHE_MAX_SIZE: int = 10_000
+    # Prometheus request metrics of each worker, served at METRICS_PATH
+    METRICS_ENABLED: bool = True
+    METRICS_PATH: str = "/metrics"
+    # Server-Timing header per request (MongoDB commands, auth, serialization)
+    # and a warning log, with the commands run, for slower requests
+    REQUEST_TRACING_ENABLED: bool = True
+    SLOW_REQUEST_THRESHOLD_MS: int = 1000
+    # superuser-only sampling profiler at /debug/profile
+    PROFILER_ENABLED: bool = True
+    PROFILER_MAX_SECONDS: int = 60
+    PROFILER_INTERVAL_MS: float = 10
     # BACKEND_CORS_ORIGINS is a JSON-formatted list of origins
     # e.g: '["http://localhost", "http://localhost:4200", "http://localhost:3000", \
     # "http://localhost:8080", "http://local.dockertoolbox.tiangolo.com"]'
@@ -125,16 +239,36 @@ class Settings(BaseSettings):
             return (
                 env_settings,
                 init_settings,
-                hydra_config_settings_source,
+                config_settings_source,
                 file_secret_settings,
             )
 
 
+def write_snapshot(path: Path) -> None:
+    """Write the composed config.yaml (interpolations resolved) as JSON.
+
+    Only the Hydra source is captured: environment variables and .env still
+    apply on top of the snapshot, and unset defaults (e.g. a random
+    SECRET_KEY) are not frozen into the file.
+    """
+    path.write_text(json.dumps(hydra_config_settings_source(None), indent=2))
+
+
 settings = Settings()
 
 
 if __name__ == "__main__":
-    from icecream import ic
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--snapshot", type=Path, help=f"write a snapshot to load with {SNAPSHOT_ENV}"
+    )
+    args = parser.parse_args()
+    if args.snapshot:
+        write_snapshot(args.snapshot)
+    else:
+        from icecream import ic
 
-    ic(proj_dir)
-    ic(settings)
+        ic(proj_dir)
+        ic(settings)
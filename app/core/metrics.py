@@ -0,0 +1,178 @@
+import time
+from bisect import bisect_left
+from dataclasses import asdict, is_dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# latency buckets in seconds, the usual Prometheus client defaults
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# label of requests that matched no route, so 404 scans cannot add series
+UNMATCHED_ROUTE = "<unmatched>"
+
+# methods labelled as sent; any other token a client makes up is OTHER_METHOD
+KNOWN_METHODS = frozenset(
+    {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE", "CONNECT"}
+)
+OTHER_METHOD = "other"
+
+Collector = Callable[[], Iterator[str]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", r"\\").replace('"', r"\"").replace("\n", r"\n")
+
+
+def _labels(**labels: Any) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+    return f"{{{pairs}}}"
+
+
+def _header(name: str, type_: str, help_: str) -> Iterator[str]:
+    yield f"# HELP {name} {help_}"
+    yield f"# TYPE {name} {type_}"
+
+
+class RequestMetrics:
+    """Request counters and latency histograms of this worker process.
+
+    Every update happens on the event loop thread, so plain dicts and ints
+    are enough: there is nothing to lock. With several workers each one
+    exposes its own numbers.
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        # (method, route, status) -> [count, sum, bucket counts..., +Inf count]
+        self._series: Dict[Tuple[str, str, int], List[float]] = {}
+        self.in_flight = 0
+        self._collectors: List[Collector] = []
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        key = (method, route, status)
+        if (series := self._series.get(key)) is None:
+            series = self._series[key] = [0, 0.0] + [0] * (len(self.buckets) + 1)
+        series[0] += 1
+        series[1] += seconds
+        series[2 + bisect_left(self.buckets, seconds)] += 1
+
+    def add_collector(self, collector: Collector) -> None:
+        """Register a callable yielding extra exposition lines on each scrape."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines = [
+            *_header("http_requests_in_flight", "gauge", "Requests being processed."),
+            f"http_requests_in_flight {self.in_flight}",
+            *_header(
+                "http_requests_total",
+                "counter",
+                "Requests by method, route template and status.",
+            ),
+        ]
+        series = sorted(self._series.items())
+        for (method, route, status), values in series:
+            labels = _labels(method=method, route=route, status=status)
+            lines.append(f"http_requests_total{labels} {values[0]}")
+        lines.extend(
+            _header(
+                "http_request_duration_seconds",
+                "histogram",
+                "Request latency by method, route template and status.",
+            )
+        )
+        for (method, route, status), values in series:
+            cumulative: float = 0
+            for le, count in zip((*self.buckets, "+Inf"), values[2:]):
+                cumulative += count
+                labels = _labels(method=method, route=route, status=status, le=le)
+                lines.append(
+                    f"http_request_duration_seconds_bucket{labels} {cumulative}"
+                )
+            labels = _labels(method=method, route=route, status=status)
+            lines.append(f"http_request_duration_seconds_sum{labels} {values[1]}")
+            lines.append(f"http_request_duration_seconds_count{labels} {values[0]}")
+        for collector in self._collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+
+def stats_collector(
+    prefix: str, help_: str, get_stats: Callable[[], Any], dict_label: str = "key"
+) -> Collector:
+    """Expose every numeric field of a stats dataclass/dict as a gauge.
+
+    Dict valued fields become one sample per key, labelled ``dict_label``.
+    """
+
+    def collect() -> Iterator[str]:
+        stats = get_stats()
+        if is_dataclass(stats) and not isinstance(stats, type):
+            stats = asdict(stats)
+        for field, value in stats.items():
+            name = f"{prefix}_{field}"
+            if isinstance(value, dict):
+                yield from _header(name, "gauge", help_)
+                for key, sample in sorted(value.items()):
+                    yield f"{name}{_labels(**{dict_label: key})} {sample}"
+            elif isinstance(value, (int, float)):
+                yield from _header(name, "gauge", help_)
+                yield f"{name} {value}"
+
+    return collect
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware feeding ``RequestMetrics``.
+
+    Requests are labelled with the template of the route that handled them
+    (``/api/v1/items/{id}``), never the raw path.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: RequestMetrics):
+        self.app = app
+        self.metrics = metrics
+        self._templates: Optional[Dict[Any, str]] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics = self.metrics
+        metrics.in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight -= 1
+            method = scope["method"]
+            metrics.observe(
+                method if method in KNOWN_METHODS else OTHER_METHOD,
+                self._route_template(scope),
+                status,
+                time.perf_counter() - start,
+            )
+
+    def _route_template(self, scope: Scope) -> str:
+        # the router stores the matched endpoint in the (shared) scope
+        if (endpoint := scope.get("endpoint")) is None:
+            return UNMATCHED_ROUTE
+        if self._templates is None:
+            self._templates = {}
+            for route in scope["app"].routes:
+                if (path := getattr(route, "path", None)) is not None:
+                    self._templates.setdefault(getattr(route, "endpoint", None), path)
+        return self._templates.get(endpoint, UNMATCHED_ROUTE)
@@ -0,0 +1,118 @@
+import asyncio
+import os
+import sys
+import threading
+from collections import Counter
+from types import CodeType, FrameType
+from typing import Dict, List, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class ProfilerBusy(RuntimeError):
+    """Raised when a profile is requested while another one is running."""
+
+
+class SamplingProfiler:
+    """Sample the Python stacks of every thread of this worker.
+
+    A background thread wakes up every ``interval`` seconds and reads
+    ``sys._current_frames()``; nothing runs (and nothing is hooked into the
+    interpreter) while no profile is being taken. Stacks of the event loop
+    thread are prefixed with the asyncio task running at sample time, other
+    threads (motor's executor, the threadpool of sync endpoints) with the
+    thread name. The result is in the collapsed format read by
+    flamegraph.pl, speedscope or inferno.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._labels: Dict[CodeType, str] = {}
+        self.running = False
+
+    async def profile(self, seconds: float, interval: float) -> str:
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("a profile is already being taken")
+        try:
+            self.running = True
+            samples: Counter = Counter()
+            stop = threading.Event()
+            sampler = threading.Thread(
+                target=self._sample,
+                args=(asyncio.get_running_loop(), threading.get_ident()),
+                kwargs={"interval": interval, "stop": stop, "samples": samples},
+                name="profiler",
+                daemon=True,
+            )
+            sampler.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                stop.set()
+                await asyncio.get_running_loop().run_in_executor(None, sampler.join)
+        finally:
+            self.running = False
+            self._lock.release()
+        return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+    def _sample(
+        self,
+        loop: asyncio.AbstractEventLoop,
+        loop_thread: int,
+        *,
+        interval: float,
+        stop: threading.Event,
+        samples: Counter,
+    ) -> None:
+        own = threading.get_ident()
+        while not stop.wait(interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                if thread_id == loop_thread:
+                    task = asyncio.current_task(loop)
+                    root = f"task {task.get_name()}" if task else "event loop"
+                else:
+                    root = f"thread {names.get(thread_id, thread_id)}"
+                samples[self._collapse(root, frame)] += 1
+
+    def _collapse(self, root: str, frame: Optional[FrameType]) -> str:
+        stack: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            if (label := self._labels.get(code)) is None:
+                label = self._labels[code] = (
+                    f"{code.co_name} ({_short_path(code.co_filename)}:"
+                    f"{code.co_firstlineno})"
+                )
+            stack.append(label)
+            frame = frame.f_back
+        stack.append(root)
+        # collapsed stacks are root first, frames are separated by ";"
+        return ";".join(reversed(stack))
+
+
+def _short_path(filename: str) -> str:
+    for prefix in sorted(sys.path, key=len, reverse=True):
+        if prefix and filename.startswith(prefix + os.sep):
+            return filename[len(prefix) + 1 :]
+    return filename
+
+
+class TaskNamingMiddleware:
+    """Name the task of each request ``METHOD /path`` while a profile runs,
+    so its samples can be told apart; a single attribute check otherwise."""
+
+    def __init__(self, app: ASGIApp, profiler: SamplingProfiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if self.profiler.running and scope["type"] == "http":
+            if (task := asyncio.current_task()) is not None:
+                task.set_name(f"{scope['method']} {scope['path']}")
+        await self.app(scope, receive, send)
+
+
+profiler = SamplingProfiler()
@@ -0,0 +1,146 @@
+import asyncio
+import math
+import time
+from typing import Dict, Hashable, List, Optional
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+class RateLimited(Exception):
+    """Raised when a client is over its limit; retry in ``retry_after`` s."""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"rate limited, retry in {retry_after:.1f}s")
+        self.retry_after = retry_after
+
+
+def parse_limit(limit: str) -> "TokenBucketLimiter":
+    """``"10/minute"``: bursts of 10, refilled at 10 tokens per minute."""
+    try:
+        count, period = limit.split("/")
+        burst, seconds = int(count), _PERIODS[period.strip()]
+    except (ValueError, KeyError) as exc:
+        raise ValueError(f"invalid rate limit {limit!r}") from exc
+    return TokenBucketLimiter(rate=burst / seconds, burst=burst)
+
+
+class TokenBucketLimiter:
+    """Token buckets keyed by client IP, username, ...
+
+    Buckets are spread over ``shards`` dicts so ``evict_expired`` can sweep
+    them a shard at a time without stalling the event loop; a bucket is
+    dropped once it has refilled, since a full bucket is what a missing one
+    means anyway. ``max_keys_per_shard`` bounds memory even while keys are
+    sprayed faster than buckets refill: a full shard evicts nothing (that
+    would reset a drained bucket, e.g. the username under attack), new keys
+    share one overflow bucket until eviction makes room.
+    Event loop only, like ``TTLCache``.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        *,
+        shards: int = 16,
+        max_keys_per_shard: int = 10_000,
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.shards = shards
+        self.max_keys_per_shard = max_keys_per_shard
+        # key -> [tokens, last refill]
+        self._shards: List[Dict[Hashable, List[float]]] = [{} for _ in range(shards)]
+        self._overflow = [float(burst), time.monotonic()]
+        self.rejected = 0
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+    def acquire(self, key: Hashable) -> None:
+        """Take a token for ``key`` or raise ``RateLimited``."""
+        now = time.monotonic()
+        shard = self._shards[hash(key) % self.shards]
+        if (bucket := shard.get(key)) is None:
+            if len(shard) >= self.max_keys_per_shard:
+                bucket = self._overflow
+            else:
+                bucket = shard[key] = [float(self.burst), now]
+        tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+        if tokens < 1:
+            bucket[0] = tokens
+            self.rejected += 1
+            raise RateLimited((1 - tokens) / self.rate)
+        bucket[0] = tokens - 1
+
+    def clear(self) -> None:
+        for shard in self._shards:
+            shard.clear()
+        self._overflow = [float(self.burst), time.monotonic()]
+
+    def evict_expired(self, shard_index: int) -> int:
+        now = time.monotonic()
+        shard = self._shards[shard_index]
+        expired = [
+            key
+            for key, (tokens, updated) in shard.items()
+            if tokens + (now - updated) * self.rate >= self.burst
+        ]
+        for key in expired:
+            del shard[key]
+        return len(expired)
+
+
+class RateLimits:
+    """Limiters of every rate limited route, and their background eviction."""
+
+    def __init__(self) -> None:
+        self._limiters: Dict[str, TokenBucketLimiter] = {}
+        self._eviction: Optional[asyncio.Task] = None
+
+    def add(self, name: str, limit: Optional[str]) -> None:
+        if limit:
+            self._limiters[name] = parse_limit(limit)
+
+    def acquire(self, name: str, key: Hashable) -> None:
+        """Raise ``RateLimited`` when ``key`` is over limit ``name``, if any."""
+        if (limiter := self._limiters.get(name)) is not None:
+            limiter.acquire(key)
+
+    def clear(self) -> None:
+        for limiter in self._limiters.values():
+            limiter.clear()
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            "buckets": {name: len(lim) for name, lim in self._limiters.items()},
+            "rejected": {name: lim.rejected for name, lim in self._limiters.items()},
+        }
+
+    def start_eviction(self, interval: float = 1.0) -> None:
+        if self._eviction is None and self._limiters:
+            self._eviction = asyncio.create_task(self._evict_forever(interval))
+
+    async def stop_eviction(self) -> None:
+        if self._eviction is not None:
+            self._eviction.cancel()
+            try:
+                await self._eviction
+            except asyncio.CancelledError:
+                pass
+            self._eviction = None
+
+    async def _evict_forever(self, interval: float) -> None:
+        # one shard of each limiter per tick: every shard is visited within
+        # shards * interval seconds
+        shard = 0
+        while True:
+            await asyncio.sleep(interval)
+            for limiter in self._limiters.values():
+                limiter.evict_expired(shard % limiter.shards)
+            shard += 1
+
+
+def retry_after_header(retry_after: float) -> str:
+    return str(max(1, math.ceil(retry_after)))
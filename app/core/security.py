@@ -1,19 +1,68 @@
 from datetime import datetime, timedelta
-from typing import Any, Union
-
-from jose import jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Optional, Union
 
+from app.core.cache import PrincipalCache, TTLCache
 from app.core.config import settings
+from app.core.ratelimit import RateLimits
+from app.core.workers import BoundedWorkerPool
+
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+# passlib and jose are imported on first use: CLI tools and tests that never
+# hash or sign skip their import cost, the app loads them in warm_up()
+@lru_cache()
+def pwd_context() -> "CryptContext":
+    from passlib.context import CryptContext
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def warm_up() -> None:
+    from jose import jwt  # noqa: F401
+
+    pwd_context()
+
+
+# bcrypt costs ~200-300ms per call; never run it on the event loop
+password_hash_pool = BoundedWorkerPool(
+    kind=settings.PASSWORD_HASH_EXECUTOR,
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+)
+
+# token -> (decoded payload, user snapshot); saves a user lookup per request
+principal_cache = PrincipalCache(
+    maxsize=settings.AUTH_CACHE_MAX_SIZE if settings.AUTH_CACHE_ENABLED else 0,
+    ttl=settings.AUTH_CACHE_TTL_SECONDS,
+)
+
+# user id -> lowest token version still valid, for revocations made by this
+# worker: the other workers see them when the access tokens expire
+token_revocations: TTLCache[Any, int] = TTLCache(
+    maxsize=settings.AUTH_CACHE_MAX_SIZE,
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# token buckets of the rate limited routes, see deps.login_rate_limit
+rate_limits = RateLimits()
+rate_limits.add("login:ip", settings.LOGIN_RATE_LIMIT_PER_IP)
+rate_limits.add("login:username", settings.LOGIN_RATE_LIMIT_PER_USERNAME)
 
 
 ALGORITHM = "HS256"
 
 
 def create_access_token(
-    subject: Union[str, Any], expires_delta: timedelta = None
+    subject: Union[str, Any],
+    expires_delta: timedelta = None,
+    claims: Optional[Dict[str, Any]] = None,
 ) -> str:
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -21,14 +70,55 @@ def create_access_token(
         expire = datetime.utcnow() + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject)}
+    to_encode.setdefault("type", "access")
+    from jose import jwt
+
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def create_refresh_token(subject: Union[str, Any], version: int) -> str:
+    return create_access_token(
+        subject,
+        expires_delta=timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES),
+        claims={"type": "refresh", "ver": version},
+    )
+
+
+def revoke_tokens(user_id: Any, version: int) -> None:
+    """Reject this worker's tokens of ``user_id`` older than ``version`` now."""
+    token_revocations.set(user_id, version)
+    principal_cache.invalidate_user(user_id)
+
+
+def is_revoked(user_id: Any, version: int) -> bool:
+    valid_from = token_revocations.get(user_id)
+    return valid_from is not None and version < valid_from
+
+
+def decode_access_token(token: str) -> Dict[str, Any]:
+    from jose import jwt
+
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.JWTError as exc:
+        raise InvalidToken(str(exc)) from exc
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    return pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return pwd_context().hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hash_pool.run(
+        verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hash_pool.run(get_password_hash, password)
@@ -0,0 +1,124 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utilities.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+@dataclass
+class CommandRecord:
+    name: str
+    # collection, or database for database level commands
+    target: str
+    seconds: float
+    # documents returned (cursor batches) or affected (``n`` of writes)
+    documents: int
+    failed: bool = False
+
+
+class RequestTrace:
+    """What one request spent its time on.
+
+    Commands are recorded by ``app.db.monitoring.CommandTracer`` from motor's
+    executor threads: motor copies the context of the awaiting task into the
+    thread, so ``current_trace`` resolves to the request's trace there too.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        # span name -> accumulated seconds
+        self.spans: Dict[str, float] = {}
+        self.commands: List[CommandRecord] = []
+        # pymongo request id -> (command name, target), until it completes
+        self.pending: Dict[int, Tuple[str, str]] = {}
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def db_seconds(self) -> float:
+        return sum(command.seconds for command in self.commands)
+
+    def server_timing(self) -> str:
+        entries = [
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{len(self.commands)} commands"'
+        ]
+        for name, seconds in self.spans.items():
+            entries.append(f"{name};dur={seconds * 1000:.1f}")
+        entries.append(f"total;dur={self.elapsed * 1000:.1f}")
+        return ", ".join(entries)
+
+
+current_trace: ContextVar[Optional[RequestTrace]] = ContextVar(
+    "current_trace", default=None
+)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Add the time spent in the block to span ``name`` of the current request."""
+    if (trace := current_trace.get()) is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.spans[name] = trace.spans.get(name, 0.0) + time.perf_counter() - start
+
+
+class TracingMiddleware:
+    """Trace every request: a ``Server-Timing`` header with the MongoDB time
+    (and command count), the ``span`` totals and the total time up to the
+    response start, plus a warning with every command of requests slower
+    than ``slow_threshold`` seconds.
+    """
+
+    def __init__(self, app: ASGIApp, slow_threshold: float):
+        self.app = app
+        self.slow_threshold = slow_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+        status = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        token = current_trace.set(trace)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_trace.reset(token)
+            if trace.elapsed >= self.slow_threshold:
+                self._log_slow(scope, status, trace)
+
+    @staticmethod
+    def _log_slow(scope: Scope, status: int, trace: RequestTrace) -> None:
+        commands = "".join(
+            f"\n  {c.name} {c.target} {c.seconds * 1000:.1f}ms {c.documents} docs"
+            + (" FAILED" if c.failed else "")
+            for c in trace.commands
+        )
+        logger.warning(
+            f"slow request {scope['method']} {scope['path']} {status} "
+            f"{trace.elapsed * 1000:.1f}ms ({trace.server_timing()})"
+            f"{commands}"
+        )
@@ -0,0 +1,105 @@
+import asyncio
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class WorkerPoolFull(RuntimeError):
+    """Raised when a job is submitted to a pool whose queue is already full."""
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    max_workers: int
+    queue_size: int
+    in_flight: int
+    queue_depth: int
+    completed: int
+    rejected: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+
+
+def _call_timed(fn: Callable[..., T], *args: Any) -> Tuple[float, T]:
+    # time.monotonic is system wide, so it is comparable across worker processes
+    return time.monotonic(), fn(*args)
+
+
+class BoundedWorkerPool:
+    """Run blocking, CPU bound callables off the event loop.
+
+    At most ``max_workers`` jobs run at the same time and at most ``queue_size``
+    jobs wait for a free worker; anything beyond that is rejected with
+    ``WorkerPoolFull`` instead of piling up behind the workers. The executor is
+    created on first use, so importing the module stays cheap.
+    """
+
+    def __init__(
+        self,
+        kind: str = "thread",
+        max_workers: Optional[int] = None,
+        queue_size: int = 64,
+    ):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"unknown worker pool kind: {kind!r}")
+        self.kind = kind
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self.queue_size = queue_size
+        self._executor: Optional[Executor] = None
+        self._in_flight = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="worker-pool"
+                )
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        if self._in_flight >= self.max_workers + self.queue_size:
+            self._rejected += 1
+            raise WorkerPoolFull(
+                f"{self.kind} pool is full ({self._in_flight} jobs in flight)"
+            )
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        submitted_at = time.monotonic()
+        try:
+            started_at, result = await loop.run_in_executor(
+                self._get_executor(), _call_timed, fn, *args
+            )
+        finally:
+            self._in_flight -= 1
+        wait = max(0.0, started_at - submitted_at)
+        self._completed += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        return result
+
+    def stats(self) -> PoolStats:
+        return PoolStats(
+            max_workers=self.max_workers,
+            queue_size=self.queue_size,
+            in_flight=self._in_flight,
+            queue_depth=max(0, self._in_flight - self.max_workers),
+            completed=self._completed,
+            rejected=self._rejected,
+            wait_seconds_total=self._wait_total,
+            wait_seconds_max=self._wait_max,
+        )
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
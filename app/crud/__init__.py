@@ -1,2 +1,3 @@
 from .crud_item import item
+from .crud_item_stats import item_stats
 from .crud_user import user
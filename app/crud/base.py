@@ -1,28 +1,152 @@
-from typing import Any, Dict, Generic, Optional, Type, TypeVar, Union
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    Generic,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    TypeVar,
+    Union,
+)
 
 from fastapi.encoders import jsonable_encoder
+from motor.motor_asyncio import AsyncIOMotorClientSession, AsyncIOMotorCollection
+from odmantic import AIOEngine
 from odmantic import Model as DBModel
-from odmantic.session import AIOSession
+from odmantic import ObjectId
+from odmantic.query import QueryExpression, SortExpression, and_
+from odmantic.session import AIOSession, AIOTransaction
 from pydantic import BaseModel
 
+from app.crud import pagination
+
 ModelType = TypeVar("ModelType", bound=DBModel)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
+# CRUD methods run in a session, a transaction or directly on the engine
+AIOSessionType = Union[AIOSession, AIOTransaction, AIOEngine]
+
 
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # integer field incremented by every update (see CRUDItem), None: no version
+    version_field: Optional[str] = None
+
     def __init__(self, model_cls: Type[ModelType]):
         self.model_cls = model_cls
 
-    async def get(self, db: AIOSession, id: Any) -> Optional[ModelType]:
+    async def get(self, db: AIOSessionType, id: Any) -> Optional[ModelType]:
         return await db.find_one(self.model_cls, self.model_cls.id == id)
 
     async def get_multi(
-        self, db: AIOSession, *, skip: int = 0, limit: int = 100
+        self,
+        db: AIOSessionType,
+        *queries: Any,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort_field: str = "id",
     ) -> list[ModelType]:
-        return await db.find(self.model_cls, skip=skip, limit=limit)
+        """Page through documents ordered by ``sort_field``.
+
+        With ``cursor=None`` the legacy ``skip`` paging is used, in natural
+        order as before (``sort_field`` is ignored). Any other value
+        (``""`` for the first page) switches to keyset paging: the query resumes
+        right after the document the cursor points at, so every page costs the
+        same whatever its depth. ``sort_field`` should be indexed.
+        """
+        queries, sort, skip = self._page_args(queries, skip, cursor, sort_field)
+        return await db.find(
+            self.model_cls, *queries, sort=sort, skip=skip, limit=limit
+        )
+
+    def _page_args(
+        self,
+        queries: Tuple[Any, ...],
+        skip: int,
+        cursor: Optional[str],
+        sort_field: str,
+    ) -> Tuple[Tuple[Any, ...], Optional[SortExpression], int]:
+        if cursor is None:
+            return queries, None, skip
+        key = pagination.key_name(self.model_cls, sort_field)
+        sort = pagination.keyset_sort(key)
+        if (last := pagination.decode_cursor(cursor, key)) is not None:
+            queries = (*queries, pagination.keyset_query(key, last))
+        return queries, sort, 0
+
+    def next_cursor(
+        self, objs: Sequence[Any], *, limit: int, sort_field: str = "id"
+    ) -> Optional[str]:
+        """Cursor of the page following ``objs``, None on the last page.
+
+        ``objs`` may be models or response schemas (whose ids are strings).
+        """
+        if not objs or len(objs) < limit:
+            return None
+        last = objs[-1]
+        id_ = ObjectId(last.id)
+        value = id_ if sort_field == "id" else getattr(last, sort_field)
+        key = pagination.key_name(self.model_cls, sort_field)
+        return pagination.encode_cursor(key, value, id_)
+
+    async def count(self, db: AIOSessionType, *queries: Any) -> int:
+        """Number of documents matching ``queries``.
 
-    async def create(self, db: AIOSession, *, obj_in: CreateSchemaType) -> ModelType:
+        Without queries the count comes from the collection metadata
+        (``estimated_document_count``) instead of a scan; filtered counts
+        should be covered by an index.
+        """
+        collection = self.collection(db)
+        if not queries:
+            return await collection.estimated_document_count()
+        return await collection.count_documents(
+            self.build_query(*queries), session=self.driver_session(db)
+        )
+
+    async def stream(
+        self,
+        db: AIOSessionType,
+        *queries: Any,
+        projection: Optional[Dict[str, Any]] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Yield raw documents in ``_id`` order, ``batch_size`` per round-trip.
+
+        Memory use is bounded by one batch whatever the size of the result;
+        the server cursor is closed when the consumer stops early.
+        """
+        cursor = self.collection(db).find(
+            self.build_query(*queries),
+            projection,
+            sort=[("_id", 1)],
+            batch_size=batch_size,
+            session=self.driver_session(db),
+        )
+        try:
+            async for doc in cursor:
+                yield doc
+        finally:
+            await cursor.close()
+
+    @staticmethod
+    def build_query(*queries: Any) -> QueryExpression:
+        return and_(*queries) if queries else QueryExpression()
+
+    def collection(self, db: AIOSessionType) -> AsyncIOMotorCollection:
+        """Raw motor collection, for queries odmantic cannot express."""
+        engine = db if isinstance(db, AIOEngine) else db.engine
+        return engine.get_collection(self.model_cls)
+
+    @staticmethod
+    def driver_session(db: AIOSessionType) -> Optional[AsyncIOMotorClientSession]:
+        return None if isinstance(db, AIOEngine) else db.get_driver_session()
+
+    async def create(
+        self, db: AIOSessionType, *, obj_in: CreateSchemaType
+    ) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model_cls(**obj_in_data)
         await db.save(db_obj)
@@ -30,23 +154,51 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
 
     async def update(
         self,
-        db: AIOSession,
+        db: AIOSessionType,
         *,
         db_obj: ModelType,
         obj_in: Union[UpdateSchemaType, Dict[str, Any]],
     ) -> ModelType:
-        obj_data = jsonable_encoder(db_obj)
+        """Apply ``obj_in`` to ``db_obj`` and persist only what changed.
+
+        The changed fields are written with a single ``$set``; referenced
+        documents are left alone and a no-op update issues no write at all.
+        """
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
-        for field in obj_data:
-            if field in update_data:
-                setattr(db_obj, field, update_data[field])
-        return await db.save(db_obj)
+        pending = db_obj.__fields_modified__
+        object.__setattr__(db_obj, "__fields_modified__", set())
+        # validates the patch and only marks fields whose value differs
+        db_obj.update(update_data)
+        changed = (pending | db_obj.__fields_modified__) - {
+            self.model_cls.__primary_field__,
+            self.version_field,
+        }
+        if changed:
+            update: Dict[str, Any] = {"$set": db_obj.doc(include=changed)}
+            if self.version_field:
+                update["$inc"] = {self.version_field: 1}
+            await self.collection(db).update_one(
+                {"_id": db_obj.id}, update, session=self.driver_session(db)
+            )
+            if self.version_field:
+                version = getattr(db_obj, self.version_field)
+                setattr(db_obj, self.version_field, version + 1)
+        object.__setattr__(db_obj, "__fields_modified__", set())
+        return db_obj
 
-    async def remove(self, db: AIOSession, *, id: Any) -> ModelType:
-        if not (obj := await db.find_one(self.model_cls, self.model_cls.id == id)):
+    async def remove(self, db: AIOSessionType, *, id: Any) -> ModelType:
+        if self.model_cls.__references__:
+            # references must be resolved to build the returned model
+            if not (obj := await db.find_one(self.model_cls, self.model_cls.id == id)):
+                raise LookupError(id)
+            await db.delete(obj)
+            return obj
+        doc = await self.collection(db).find_one_and_delete(
+            {"_id": id}, session=self.driver_session(db)
+        )
+        if doc is None:
             raise LookupError(id)
-        await db.delete(obj)
-        return obj
+        return self.model_cls.parse_doc(doc)
@@ -1,27 +1,489 @@
-from typing import List
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
 
 from fastapi.encoders import jsonable_encoder
-from odmantic import ObjectId
-from odmantic.session import AIOSession
+from odmantic import AIOEngine, ObjectId
+from odmantic.session import AIOTransaction
+from pydantic import ValidationError
+from pymongo import ReturnDocument
+from pymongo.errors import BulkWriteError, WriteError
 
-from app.crud.base import CRUDBase
+from app import schemas
+from app.core.coalescer import WriteCoalescer
+from app.core.config import settings
+from app.crud import pagination
+from app.crud.base import AIOSessionType, CRUDBase
+from app.crud.crud_item_stats import item_stats
 from app.models.item import Item
 from app.models.user import User
 from app.schemas.item import ItemCreate, ItemUpdate
 
+# lean reads never resolve the owner Reference, they only need its ObjectId
+_LEAN_PROJECTION = {"title": 1, "description": 1, "owner": 1, "version": 1}
+
+
+class VersionMismatch(Exception):
+    """The item exists but its version is not the expected one."""
+
 
 class CRUDItem(CRUDBase[Item, ItemCreate, ItemUpdate]):
+    """Item CRUD.
+
+    The ``*_lean`` reads skip the ``$lookup`` odmantic runs to resolve
+    ``Item.owner``: the documents are fetched with a projection and returned
+    directly as ``schemas.Item`` (which only exposes ``owner_id``).
+
+    Creations and removals are also counted in ``crud.item_stats``.
+
+    With a ``coalescer``, ``create_with_owner`` queues its insert to be
+    written with those of concurrent requests in one ``insert_many``.
+    """
+
+    version_field = "version"
+    # set below when ITEMS_WRITE_COALESCING is on
+    coalescer: Optional[WriteCoalescer[AIOEngine, Dict[str, Any]]] = None
+
+    async def get_lean(self, db: AIOSessionType, id: Any) -> Optional[schemas.Item]:
+        doc = await self.collection(db).find_one(
+            {"_id": id}, _LEAN_PROJECTION, session=self.driver_session(db)
+        )
+        return self._lean_item(doc) if doc else None
+
+    async def get_multi_lean(
+        self,
+        db: AIOSessionType,
+        *queries: Any,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        sort_field: str = "id",
+    ) -> List[schemas.Item]:
+        queries, sort, skip = self._page_args(queries, skip, cursor, sort_field)
+        docs = self.collection(db).find(
+            self.build_query(*queries),
+            _LEAN_PROJECTION,
+            sort=list(sort.items()) if sort else None,
+            skip=skip,
+            limit=limit,
+            session=self.driver_session(db),
+        )
+        return [self._lean_item(doc) async for doc in docs]
+
+    async def update_owned(
+        self,
+        db: AIOSessionType,
+        *,
+        id: ObjectId,
+        obj_in: Union[ItemUpdate, Dict[str, Any]],
+        owner_id: Optional[ObjectId] = None,
+        version: Optional[int] = None,
+    ) -> schemas.Item:
+        """Update an item in one ``find_one_and_update`` round-trip.
+
+        With ``owner_id`` the ownership check is part of the filter, so there
+        is no window between the check and the write; the same goes for the
+        expected ``version`` (``If-Match``).
+
+        Raises:
+            LookupError: no item with this id
+            PermissionError: the item belongs to another owner
+            VersionMismatch: the item is not at ``version``
+        """
+        if isinstance(obj_in, dict):
+            update_data = obj_in
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        changes = self._validate_fields(update_data)
+        changes.pop(self.version_field, None)
+        collection, session = self.collection(db), self.driver_session(db)
+        query = self._owned_query(id, owner_id)
+        if version is not None:
+            # documents without the field are at version 0
+            query["version"] = version if version else {"$in": [0, None]}
+        if changes:
+            doc = await collection.find_one_and_update(
+                query,
+                {"$set": changes, "$inc": {self.version_field: 1}},
+                projection=_LEAN_PROJECTION,
+                return_document=ReturnDocument.AFTER,
+                session=session,
+            )
+        else:
+            doc = await collection.find_one(query, _LEAN_PROJECTION, session=session)
+        if doc is None:
+            await self._raise_missing_or_forbidden(
+                db, id, owner_id=owner_id, version=version
+            )
+        return self._lean_item(doc)
+
+    async def remove_owned(
+        self, db: AIOSessionType, *, id: ObjectId, owner_id: Optional[ObjectId] = None
+    ) -> schemas.Item:
+        """Delete an item in one ``find_one_and_delete`` round-trip.
+
+        Raises:
+            LookupError: no item with this id
+            PermissionError: the item belongs to another owner
+        """
+        doc = await self.collection(db).find_one_and_delete(
+            self._owned_query(id, owner_id),
+            projection=_LEAN_PROJECTION,
+            session=self.driver_session(db),
+        )
+        if doc is None:
+            await self._raise_missing_or_forbidden(db, id)
+        await item_stats.record_removed(db, owner_id=doc["owner"], count=1)
+        return self._lean_item(doc)
+
+    async def remove(self, db: AIOSessionType, *, id: Any) -> Item:
+        obj = await super().remove(db, id=id)
+        await item_stats.record_removed(db, owner_id=obj.owner.id, count=1)
+        return obj
+
+    @staticmethod
+    def _owned_query(id: ObjectId, owner_id: Optional[ObjectId]) -> Dict[str, Any]:
+        if owner_id is None:
+            return {"_id": id}
+        return {"_id": id, "owner": owner_id}
+
+    async def _raise_missing_or_forbidden(
+        self,
+        db: AIOSessionType,
+        id: ObjectId,
+        *,
+        owner_id: Optional[ObjectId] = None,
+        version: Optional[int] = None,
+    ) -> None:
+        # only reached when the conditional write matched nothing
+        if version is None:
+            if await self.collection(db).count_documents(
+                {"_id": id}, limit=1, session=self.driver_session(db)
+            ):
+                raise PermissionError(id)
+            raise LookupError(id)
+        doc = await self.collection(db).find_one(
+            {"_id": id}, {"owner": 1}, session=self.driver_session(db)
+        )
+        if doc is None:
+            raise LookupError(id)
+        if owner_id is not None and doc["owner"] != owner_id:
+            raise PermissionError(id)
+        raise VersionMismatch(id)
+
+    def _validate_fields(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate a partial update against the model fields, skip the rest."""
+        validated, errors = {}, []
+        for name, value in data.items():
+            if name == self.model_cls.__primary_field__ or name in (
+                self.model_cls.__references__
+            ):
+                continue
+            if (field := self.model_cls.__fields__.get(name)) is None:
+                continue
+            value, error = field.validate(value, {}, loc=name)
+            if error:
+                errors.append(error)
+            else:
+                validated[self.model_cls.__odm_fields__[name].key_name] = value
+        if errors:
+            raise ValidationError(errors, self.model_cls)
+        return validated
+
+    @staticmethod
+    def _lean_item(doc: Dict[str, Any]) -> schemas.Item:
+        return schemas.Item(
+            id=doc["_id"],
+            title=doc["title"],
+            description=doc.get("description"),
+            owner_id=str(doc["owner"]),
+            version=doc.get("version", 0),
+        )
+
     async def create_with_owner(
-        self, db: AIOSession, *, obj_in: ItemCreate, owner: User
+        self, db: AIOSessionType, *, obj_in: ItemCreate, owner: User
     ) -> Item:
         obj_in_data = jsonable_encoder(obj_in)
         db_obj = self.model_cls(**obj_in_data, owner=owner)
-        return await db.save(db_obj)
+        # a transaction's writes cannot be shared with other requests
+        if self.coalescer is not None and not isinstance(db, AIOTransaction):
+            engine = db if isinstance(db, AIOEngine) else db.engine
+            # unlike db.save, the owner document is not saved along
+            await self.coalescer.submit(engine, db_obj.doc())
+            object.__setattr__(db_obj, "__fields_modified__", set())
+            return db_obj
+        await db.save(db_obj)
+        await item_stats.record_created(db, owner_id=owner.id, ids=[db_obj.id])
+        return db_obj
+
+    async def _insert_batch(
+        self, engine: AIOEngine, docs: List[Dict[str, Any]]
+    ) -> Mapping[int, Exception]:
+        # flush of the coalescer: every queued insert of ``engine`` at once
+        errors: Dict[int, Exception] = {}
+        try:
+            await engine.get_collection(self.model_cls).insert_many(docs, ordered=False)
+        except BulkWriteError as exc:
+            errors = {
+                error["index"]: WriteError(error["errmsg"], error["code"], error)
+                for error in exc.details.get("writeErrors", [])
+            }
+        created: Dict[ObjectId, List[ObjectId]] = {}
+        for index, doc in enumerate(docs):
+            if index not in errors:
+                created.setdefault(doc["owner"], []).append(doc["_id"])
+        for owner_id, ids in created.items():
+            await item_stats.record_created(engine, owner_id=owner_id, ids=ids)
+        return errors
+
+    async def create_many_with_owner(
+        self,
+        db: AIOSessionType,
+        *,
+        objs_in: Sequence[ItemCreate],
+        owner_id: ObjectId,
+        chunk_size: Optional[int] = None,
+    ) -> List[schemas.BulkItemResult]:
+        """Insert items with unordered ``insert_many`` calls of ``chunk_size``.
+
+        A failing document does not stop the others; the result of every
+        element is reported at its position in ``objs_in``. A chunk whose
+        ``insert_many`` fails as a whole (e.g. a network error) is reported
+        as failed, the following chunks are still attempted.
+        """
+        chunk_size = chunk_size or settings.ITEMS_BULK_CHUNK_SIZE
+        collection, session = self.collection(db), self.driver_session(db)
+        results = []
+        for start in range(0, len(objs_in), chunk_size):
+            docs: List[Dict[str, Any]] = [
+                {**obj_in.dict(), "_id": ObjectId(), "owner": owner_id, "version": 0}
+                for obj_in in objs_in[start : start + chunk_size]
+            ]
+            errors: Dict[int, str] = {}
+            try:
+                await collection.insert_many(docs, ordered=False, session=session)
+            except BulkWriteError as exc:
+                errors = {
+                    error["index"]: error["errmsg"]
+                    for error in exc.details.get("writeErrors", [])
+                }
+            except Exception as exc:
+                # which documents made it is unknown: none is reported created
+                errors = {offset: str(exc) for offset in range(len(docs))}
+            await item_stats.record_created(
+                db,
+                owner_id=owner_id,
+                ids=[doc["_id"] for i, doc in enumerate(docs) if i not in errors],
+            )
+            for offset, doc in enumerate(docs):
+                error = errors.get(offset)
+                results.append(
+                    schemas.BulkItemResult(
+                        index=start + offset,
+                        id=None if error else str(doc["_id"]),
+                        ok=error is None,
+                        error=error,
+                    )
+                )
+        return results
+
+    async def remove_many_owned(
+        self,
+        db: AIOSessionType,
+        *,
+        ids: Sequence[ObjectId],
+        owner_id: Optional[ObjectId] = None,
+        chunk_size: Optional[int] = None,
+    ) -> List[schemas.BulkItemResult]:
+        """Delete items with one ``delete_many`` per chunk of ``chunk_size``.
+
+        Each chunk is classified first (one projected ``find``) so every id
+        is reported as deleted, not found or not owned; a repeated id is
+        only deleted once, its repeats are reported as errors. Deletes are
+        issued per owner, so each owner's statistics drop by what was really
+        deleted. When a delete removes fewer items than were classified, the
+        chunk changed in between: its ids are looked up again, and those whose
+        outcome cannot be told apart from a concurrent request's are reported
+        as errors rather than as deleted by this call.
+        """
+        chunk_size = chunk_size or settings.ITEMS_BULK_CHUNK_SIZE
+        collection, session = self.collection(db), self.driver_session(db)
+        results = []
+        # (index in ids, id) of the first occurrence of each id, in order
+        unique: List[Tuple[int, ObjectId]] = []
+        seen = set()
+        for index, id_ in enumerate(ids):
+            if id_ in seen:
+                results.append(
+                    schemas.BulkItemResult(
+                        index=index, id=str(id_), ok=False, error="Duplicate id"
+                    )
+                )
+            else:
+                seen.add(id_)
+                unique.append((index, id_))
+        for start in range(0, len(unique), chunk_size):
+            chunk = unique[start : start + chunk_size]
+            owners = {
+                doc["_id"]: doc["owner"]
+                async for doc in collection.find(
+                    {"_id": {"$in": [id_ for _, id_ in chunk]}},
+                    {"owner": 1},
+                    session=session,
+                )
+            }
+            by_owner: Dict[ObjectId, List[ObjectId]] = {}
+            for id_, owner in owners.items():
+                if owner_id is None or owner == owner_id:
+                    by_owner.setdefault(owner, []).append(id_)
+            # id -> error of the ids that changed between the find and the delete
+            conflicts: Dict[ObjectId, str] = {}
+            for owner, allowed in by_owner.items():
+                result = await collection.delete_many(
+                    {"_id": {"$in": allowed}, "owner": owner}, session=session
+                )
+                await item_stats.record_removed(
+                    db, owner_id=owner, count=result.deleted_count
+                )
+                if result.deleted_count != len(allowed):
+                    conflicts.update(
+                        await self._delete_conflicts(
+                            db, allowed, deleted_count=result.deleted_count
+                        )
+                    )
+            for index, id_ in chunk:
+                if id_ in conflicts:
+                    error: Optional[str] = conflicts[id_]
+                elif id_ not in owners:
+                    error = "Item not found"
+                elif owner_id is not None and owners[id_] != owner_id:
+                    error = "Not enough permissions"
+                else:
+                    error = None
+                results.append(
+                    schemas.BulkItemResult(
+                        index=index, id=str(id_), ok=error is None, error=error
+                    )
+                )
+        results.sort(key=lambda result: result.index)
+        return results
+
+    async def _delete_conflicts(
+        self, db: AIOSessionType, ids: List[ObjectId], *, deleted_count: int
+    ) -> Dict[ObjectId, str]:
+        # ``ids`` were all deletable when classified, yet only ``deleted_count``
+        # of them were deleted: the ones still there changed owner, the gone
+        # ones are only known to be deleted by this call if all of them were
+        remaining = {
+            doc["_id"]
+            async for doc in self.collection(db).find(
+                {"_id": {"$in": ids}}, {"_id": 1}, session=self.driver_session(db)
+            )
+        }
+        conflicts = {id_: "Item changed concurrently" for id_ in remaining}
+        gone = [id_ for id_ in ids if id_ not in remaining]
+        if len(gone) != deleted_count:
+            conflicts.update((id_, "Item deleted concurrently") for id_ in gone)
+        return conflicts
 
     async def get_multi_by_owner(
-        self, db: AIOSession, *, owner_id: ObjectId, skip: int = 0, limit: int = 100
+        self,
+        db: AIOSessionType,
+        *,
+        owner_id: ObjectId,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
     ) -> List[Item]:
-        raise NotImplementedError
+        # backed by the (owner, _id) index declared on Item
+        return await self.get_multi(
+            db,
+            self.model_cls.owner == owner_id,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+
+    async def get_multi_by_owner_lean(
+        self,
+        db: AIOSessionType,
+        *,
+        owner_id: ObjectId,
+        skip: int = 0,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> List[schemas.Item]:
+        return await self.get_multi_lean(
+            db,
+            self.model_cls.owner == owner_id,
+            skip=skip,
+            limit=limit,
+            cursor=cursor,
+        )
+
+    async def count_by_owner(self, db: AIOSessionType, *, owner_id: ObjectId) -> int:
+        # a count scan of the (owner, _id) index, no document is read
+        return await self.count(db, self.model_cls.owner == owner_id)
+
+    async def search(
+        self,
+        db: AIOSessionType,
+        *,
+        q: str,
+        owner_id: Optional[ObjectId] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[schemas.Item], Optional[str]]:
+        """Lean items matching ``q`` on the title/description text index, most
+        relevant first, with the cursor of the next page (None on the last).
+
+        ``owner_id`` is part of the match, so other owners' items are never
+        read. Pages resume after the last ``(score, _id)`` seen instead of
+        skipping: the server still scores every match, but skipped documents
+        are not sorted and shipped again for each page.
+        """
+        # a cursor only resumes the search that issued it
+        key = f"score:{q}"
+        match: Dict[str, Any] = {"$text": {"$search": q}}
+        if owner_id is not None:
+            match["owner"] = owner_id
+        pipeline: List[Dict[str, Any]] = [
+            {"$match": match},
+            {"$addFields": {"_score": {"$meta": "textScore"}}},
+        ]
+        if (last := pagination.decode_cursor(cursor or "", key)) is not None:
+            score, id_ = last
+            pipeline.append(
+                {
+                    "$match": {
+                        "$or": [
+                            {"_score": {"$lt": score}},
+                            {"_score": score, "_id": {"$gt": id_}},
+                        ]
+                    }
+                }
+            )
+        pipeline += [
+            {"$sort": {"_score": -1, "_id": 1}},
+            {"$limit": limit},
+            {"$project": {**_LEAN_PROJECTION, "_score": 1}},
+        ]
+        docs = (
+            await self.collection(db)
+            .aggregate(pipeline, session=self.driver_session(db))
+            .to_list(length=limit)
+        )
+        next_cursor = None
+        if docs and len(docs) == limit:
+            last_doc = docs[-1]
+            next_cursor = pagination.encode_cursor(
+                key, last_doc["_score"], last_doc["_id"]
+            )
+        return [self._lean_item(doc) for doc in docs], next_cursor
 
 
 item = CRUDItem(Item)
+if settings.ITEMS_WRITE_COALESCING:
+    item.coalescer = WriteCoalescer(
+        item._insert_batch,
+        max_delay=settings.ITEMS_COALESCE_MAX_DELAY_MS / 1000,
+        max_batch=settings.ITEMS_COALESCE_MAX_BATCH,
+    )
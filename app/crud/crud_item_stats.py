@@ -0,0 +1,115 @@
+from datetime import datetime
+from typing import Optional, Sequence
+
+from odmantic import ObjectId
+from pydantic import BaseModel
+
+from app import schemas
+from app.crud.base import AIOSessionType, CRUDBase
+from app.models.item import Item
+from app.models.item_stats import ItemStats
+
+
+def _now() -> datetime:
+    # BSON dates have millisecond precision: keep values comparable
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+class CRUDItemStats(CRUDBase[ItemStats, BaseModel, BaseModel]):
+    """Per-owner item statistics, one ``item_stats`` document per owner.
+
+    ``crud.item`` updates them with an upserted ``$inc`` after each write, so
+    reading them costs one ``_id`` lookup whatever the number of items. The
+    item write and the ``$inc`` are not one transaction: a failure between
+    the two leaves the counts off until the next ``rebuild``, which should
+    also be run once on a database whose items predate the statistics.
+    """
+
+    async def record_created(
+        self, db: AIOSessionType, *, owner_id: ObjectId, ids: Sequence[ObjectId]
+    ) -> None:
+        if not ids:
+            return
+        await self.collection(db).update_one(
+            {"_id": owner_id},
+            {
+                "$inc": {"item_count": len(ids)},
+                "$max": {"last_created_at": max(id_.generation_time for id_ in ids)},
+            },
+            upsert=True,
+            session=self.driver_session(db),
+        )
+
+    async def record_removed(
+        self, db: AIOSessionType, *, owner_id: ObjectId, count: int
+    ) -> None:
+        if not count:
+            return
+        await self.collection(db).update_one(
+            {"_id": owner_id},
+            {"$inc": {"item_count": -count}, "$max": {"last_removed_at": _now()}},
+            upsert=True,
+            session=self.driver_session(db),
+        )
+
+    async def get_by_owner(
+        self, db: AIOSessionType, *, owner_id: ObjectId
+    ) -> schemas.ItemStats:
+        doc: Optional[dict] = await self.collection(db).find_one(
+            {"_id": owner_id}, session=self.driver_session(db)
+        )
+        return schemas.ItemStats(
+            owner_id=str(owner_id),
+            item_count=max(0, doc.get("item_count", 0)) if doc else 0,
+            last_created_at=doc.get("last_created_at") if doc else None,
+            last_removed_at=doc.get("last_removed_at") if doc else None,
+        )
+
+    async def rebuild(self, db: AIOSessionType) -> int:
+        """Recompute every owner's statistics from the ``item`` collection.
+
+        One aggregation groups the items by owner and ``$merge``s the counts
+        into ``item_stats``; owners left without items are then reset to 0.
+        ``last_removed_at`` cannot be recomputed and is kept. Items written
+        while the aggregation runs may be counted twice or not at all: run it
+        when writes are quiet. Returns the number of owners with items.
+        """
+        rebuilt_at = _now()
+        session = self.driver_session(db)
+        items = self.collection(db).database[Item.__collection__]
+        pipeline = [
+            {
+                "$group": {
+                    "_id": "$owner",
+                    "item_count": {"$sum": 1},
+                    "last_id": {"$max": "$_id"},
+                }
+            },
+            {
+                "$project": {
+                    "item_count": 1,
+                    "last_created_at": {"$toDate": "$last_id"},
+                    "rebuilt_at": {"$literal": rebuilt_at},
+                }
+            },
+            {
+                "$merge": {
+                    "into": ItemStats.__collection__,
+                    "whenMatched": "merge",
+                    "whenNotMatched": "insert",
+                }
+            },
+        ]
+        await items.aggregate(pipeline, session=session).to_list(length=None)
+        await self.collection(db).update_many(
+            {"rebuilt_at": {"$ne": rebuilt_at}},
+            {"$set": {"item_count": 0, "rebuilt_at": rebuilt_at}},
+            session=session,
+        )
+        return await self.collection(db).count_documents(
+            {"item_count": {"$gt": 0}}, session=session
+        )
+
+
+item_stats = CRUDItemStats(ItemStats)
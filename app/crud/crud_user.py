@@ -1,54 +1,89 @@
 from typing import Any, Dict, Optional, Union
 
-from odmantic.session import AIOSession
-
-from app.core.security import get_password_hash, verify_password
-from app.crud.base import CRUDBase
+from app.core.security import (
+    get_password_hash_async,
+    principal_cache,
+    revoke_tokens,
+    verify_password_async,
+)
+from app.crud.base import AIOSessionType, CRUDBase
 from app.models.user import User
+from app.schemas.token import TokenUser
 from app.schemas.user import UserCreate, UserUpdate
 
+# changing any of these revokes the tokens issued so far: they embed the flags
+_TOKEN_FIELDS = ("hashed_password", "is_active", "is_superuser")
+
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     async def get_by_email(
-        self, db: AIOSession, *, email: str
+        self, db: AIOSessionType, *, email: str
     ) -> Optional[User]:  # noqa
         return await db.find_one(User, User.email == email)
 
-    async def create(self, db: AIOSession, *, obj_in: UserCreate) -> User:
+    async def create(self, db: AIOSessionType, *, obj_in: UserCreate) -> User:
         db_obj = User(
             email=obj_in.email,
-            hashed_password=get_password_hash(obj_in.password),
+            hashed_password=await get_password_hash_async(obj_in.password),
             full_name=obj_in.full_name,
+            phone=obj_in.phone,
             is_superuser=obj_in.is_superuser,
         )
         return await db.save(db_obj)
 
     async def update(
-        self, db: AIOSession, *, db_obj: User, obj_in: Union[UserUpdate, Dict[str, Any]]
+        self,
+        db: AIOSessionType,
+        *,
+        db_obj: User,
+        obj_in: Union[UserUpdate, Dict[str, Any]],
     ) -> User:
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
         if "password" in update_data:
-            hashed_password = get_password_hash(update_data["password"])
+            hashed_password = await get_password_hash_async(update_data["password"])
             del update_data["password"]
             update_data["hashed_password"] = hashed_password
-        return await super().update(db, db_obj=db_obj, obj_in=update_data)
+        if any(
+            field in update_data and update_data[field] != getattr(db_obj, field)
+            for field in _TOKEN_FIELDS
+        ):
+            update_data["token_version"] = db_obj.token_version + 1
+        user = await super().update(db, db_obj=db_obj, obj_in=update_data)
+        if "token_version" in update_data:
+            revoke_tokens(user.id, user.token_version)
+        else:
+            principal_cache.invalidate_user(user.id)
+        return user
+
+    async def revoke_tokens(self, db: AIOSessionType, *, db_obj: User) -> User:
+        """Invalidate every access and refresh token issued to the user."""
+        return await self.update(
+            db, db_obj=db_obj, obj_in={"token_version": db_obj.token_version + 1}
+        )
+
+    async def remove(self, db: AIOSessionType, *, id: Any) -> User:
+        user = await super().remove(db, id=id)
+        # token-only endpoints trust the claims without a lookup: reject them
+        revoke_tokens(user.id, user.token_version + 1)
+        return user
 
     async def authenticate(
-        self, db: AIOSession, *, email: str, password: str
+        self, db: AIOSessionType, *, email: str, password: str
     ) -> Optional[User]:
         if not (_user := await self.get_by_email(db, email=email)):
             return None
-        if not verify_password(password, _user.hashed_password):
+        if not await verify_password_async(password, _user.hashed_password):
             return None
         return _user
 
-    def is_active(self, user: User) -> bool:  # noqa
+    # the user document or, on token-only endpoints, the claims of its token
+    def is_active(self, user: Union[User, TokenUser]) -> bool:  # noqa
         return user.is_active
 
-    def is_superuser(self, user: User) -> bool:  # noqa
+    def is_superuser(self, user: Union[User, TokenUser]) -> bool:  # noqa
         return user.is_superuser
 
 
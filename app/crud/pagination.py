@@ -0,0 +1,55 @@
+import base64
+import binascii
+from typing import Any, Dict, Optional, Tuple, Type
+
+from bson import json_util
+from odmantic import Model
+from odmantic.query import SortExpression
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def key_name(model_cls: Type[Model], field: str) -> str:
+    """Mongo key of a model field (``id`` -> ``_id``)."""
+    if field not in model_cls.__odm_fields__:
+        raise ValueError(f"{model_cls.__name__} has no field {field!r}")
+    return model_cls.__odm_fields__[field].key_name
+
+
+def encode_cursor(key: str, value: Any, id_: Any) -> str:
+    raw = json_util.dumps({"k": key, "v": value, "id": id_})
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, key: str) -> Optional[Tuple[Any, Any]]:
+    """Return ``(sort value, _id)`` of the last seen document.
+
+    An empty cursor starts a keyset scan from the first page.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json_util.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        cursor_key, value, id_ = data["k"], data["v"], data["id"]
+    except (binascii.Error, ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursor("malformed cursor") from exc
+    if cursor_key != key:
+        raise InvalidCursor("cursor was issued for another sort key")
+    return value, id_
+
+
+def keyset_sort(key: str) -> SortExpression:
+    # _id breaks ties so the order is total even on non-unique keys
+    if key == "_id":
+        return SortExpression({"_id": 1})
+    return SortExpression({key: 1, "_id": 1})
+
+
+def keyset_query(key: str, last: Tuple[Any, Any]) -> Dict[str, Any]:
+    value, id_ = last
+    if key == "_id":
+        return {"_id": {"$gt": id_}}
+    return {"$or": [{key: {"$gt": value}}, {key: value, "_id": {"$gt": id_}}]}
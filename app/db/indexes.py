@@ -0,0 +1,128 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Sequence, Type
+
+import pymongo
+from odmantic import AIOEngine, Model
+from odmantic.index import ODMBaseIndex
+
+from app import models
+from app.utilities.logging import get_logger
+
+logger = get_logger(__name__)
+
+# every model whose Config.indexes / Field(index=, unique=) must exist in MongoDB
+MODELS: Sequence[Type[Model]] = (models.User, models.Item)
+
+
+@dataclass
+class IndexDrift:
+    collection: str
+    # declared on the model but absent from the collection
+    missing: List[str] = field(default_factory=list)
+    # present on the collection but not declared on the model
+    unexpected: List[str] = field(default_factory=list)
+    # same name, different keys or options
+    conflicting: List[str] = field(default_factory=list)
+
+    def __bool__(self) -> bool:
+        return bool(self.missing or self.unexpected or self.conflicting)
+
+
+def declared_indexes(model: Type[Model]) -> Dict[str, pymongo.IndexModel]:
+    declared = {}
+    for index in model.__indexes__():
+        if isinstance(index, ODMBaseIndex):
+            index = index.get_pymongo_index()
+        declared[index.document["name"]] = index
+    return declared
+
+
+def _index_spec(document: Dict[str, Any]) -> Dict[str, Any]:
+    # declared keys are a SON, index_information() gives a list of pairs
+    keys = list(dict(document["key"]).items())
+    spec = {"key": keys, "unique": bool(document.get("unique", False))}
+    # the server stores the text fields of a declaration as _fts/_ftsx keys,
+    # the fields themselves only in "weights" (1 unless declared otherwise)
+    text_fields = [
+        name for name, kind in keys if kind == pymongo.TEXT and name != "_fts"
+    ]
+    if text_fields:
+        first = keys.index((text_fields[0], pymongo.TEXT))
+        rest = [key for key in keys[first:] if key[1] != pymongo.TEXT]
+        spec["key"] = [*keys[:first], ("_fts", "text"), ("_ftsx", 1), *rest]
+    if text_fields or "weights" in document:
+        spec["weights"] = {
+            **dict.fromkeys(text_fields, 1),
+            **document.get("weights", {}),
+        }
+    return spec
+
+
+async def get_index_drift(
+    engine: AIOEngine, models: Sequence[Type[Model]] = MODELS
+) -> List[IndexDrift]:
+    report = []
+    for model in models:
+        declared = declared_indexes(model)
+        existing = await engine.get_collection(model).index_information()
+        existing.pop("_id_", None)
+        drift = IndexDrift(collection=model.__collection__)
+        for name, index in declared.items():
+            if name not in existing:
+                drift.missing.append(name)
+            elif _index_spec(index.document) != _index_spec(existing[name]):
+                drift.conflicting.append(name)
+        drift.unexpected = sorted(set(existing) - set(declared))
+        report.append(drift)
+    return report
+
+
+async def ensure_indexes(
+    engine: AIOEngine,
+    models: Sequence[Type[Model]] = MODELS,
+    *,
+    update_existing: bool = False,
+) -> List[IndexDrift]:
+    """Create the declared indexes that are missing; safe to run repeatedly.
+
+    Conflicting indexes are only rebuilt with ``update_existing=True`` since
+    dropping an index on a live collection is not something to do implicitly.
+    Returns the drift found before any change was applied.
+    """
+    report = await get_index_drift(engine, models)
+    for model, drift in zip(models, report):
+        declared = declared_indexes(model)
+        collection = engine.get_collection(model)
+        if drift.missing:
+            logger.info(f"creating indexes on {drift.collection}: {drift.missing}")
+            await collection.create_indexes([declared[n] for n in drift.missing])
+        for name in drift.conflicting:
+            if update_existing:
+                logger.warning(f"rebuilding index {drift.collection}.{name}")
+                await collection.drop_index(name)
+                await collection.create_indexes([declared[name]])
+            else:
+                logger.warning(
+                    f"index {drift.collection}.{name} differs from its declaration"
+                )
+        if drift.unexpected:
+            logger.warning(
+                f"undeclared indexes on {drift.collection}: {drift.unexpected}"
+            )
+    return report
+
+
+async def main() -> int:
+    from app.db.session import get_engine
+
+    drifted = [drift for drift in await get_index_drift(get_engine()) if drift]
+    for drift in drifted:
+        logger.warning(drift)
+    return 1 if drifted else 0
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    sys.exit(asyncio.run(main()))
@@ -2,9 +2,11 @@ from odmantic.session import AIOSession
 
 from app import crud, schemas
 from app.core.config import settings
+from app.db.indexes import ensure_indexes
 
 
 async def init_db(db: AIOSession) -> None:
+    await ensure_indexes(db.engine)
     if not await crud.user.get_by_email(db, email=settings.FIRST_SUPERUSER):
         user_in = schemas.UserCreate(
             email=settings.FIRST_SUPERUSER,
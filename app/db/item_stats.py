@@ -0,0 +1,20 @@
+from app.utilities.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+async def main() -> int:
+    from app import crud
+    from app.db.session import get_engine
+
+    logger.info("Rebuilding item statistics")
+    owners = await crud.item_stats.rebuild(get_engine())
+    logger.info(f"Item statistics rebuilt for {owners} owners")
+    return 0
+
+
+if __name__ == "__main__":
+    import asyncio
+    import sys
+
+    sys.exit(asyncio.run(main()))
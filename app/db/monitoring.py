@@ -0,0 +1,156 @@
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+from pymongo import monitoring
+
+from app.core.tracing import CommandRecord, RequestTrace, current_trace
+
+
+@dataclass(frozen=True)
+class ConnectionPoolStats:
+    # connections currently open / lent to an operation, over all servers
+    open: int
+    checked_out: int
+    checkouts: int
+    # reason (timeout, poolClosed, connectionError) -> count
+    checkout_failures: Dict[str, int] = field(default_factory=dict)
+    pools_cleared: int = 0
+    # time spent waiting for a connection, failed checkouts included
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+
+class ConnectionPoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool counters of the MongoDB client of this process.
+
+    pymongo calls the listener from motor's executor threads: a checkout
+    starts and ends on the same thread, which is how wait times are paired.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._open = 0
+        self._checked_out = 0
+        self._checkouts = 0
+        self._failures: Counter = Counter()
+        self._pools_cleared = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def stats(self) -> ConnectionPoolStats:
+        with self._lock:
+            return ConnectionPoolStats(
+                open=self._open,
+                checked_out=self._checked_out,
+                checkouts=self._checkouts,
+                checkout_failures=dict(self._failures),
+                pools_cleared=self._pools_cleared,
+                wait_seconds_total=self._wait_total,
+                wait_seconds_max=self._wait_max,
+            )
+
+    def _waited(self) -> float:
+        started = getattr(self._local, "checkout_started", None)
+        self._local.checkout_started = None
+        return 0.0 if started is None else time.monotonic() - started
+
+    def _record_wait(self, wait: float) -> None:
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+
+    def connection_check_out_started(self, event):
+        self._local.checkout_started = time.monotonic()
+
+    def connection_checked_out(self, event):
+        wait = self._waited()
+        with self._lock:
+            self._checked_out += 1
+            self._checkouts += 1
+            self._record_wait(wait)
+
+    def connection_check_out_failed(self, event):
+        wait = self._waited()
+        with self._lock:
+            self._failures[event.reason] += 1
+            self._record_wait(wait)
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self._checked_out -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self._open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self._open -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self._pools_cleared += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+
+class CommandTracer(monitoring.CommandListener):
+    """Record the commands run on behalf of the current request, if any."""
+
+    def started(self, event):
+        if (trace := current_trace.get()) is None:
+            return
+        target = event.command.get(event.command_name)
+        if not isinstance(target, str):
+            target = event.database_name
+        trace.pending[event.request_id] = (event.command_name, target)
+
+    def succeeded(self, event):
+        if (trace := current_trace.get()) is not None:
+            self._record(trace, event, documents=_reply_documents(event.reply))
+
+    def failed(self, event):
+        if (trace := current_trace.get()) is not None:
+            self._record(trace, event, documents=0, failed=True)
+
+    @staticmethod
+    def _record(
+        trace: RequestTrace, event, *, documents: int, failed: bool = False
+    ) -> None:
+        name, target = trace.pending.pop(event.request_id, (event.command_name, ""))
+        trace.commands.append(
+            CommandRecord(
+                name=name,
+                target=target,
+                seconds=event.duration_micros / 1_000_000,
+                documents=documents,
+                failed=failed,
+            )
+        )
+
+
+def _reply_documents(reply: Dict[str, Any]) -> int:
+    # read from the decoded reply: re-encoding it to measure its size would
+    # cost as much as decoding it did, on every batch of every cursor
+    if isinstance(cursor := reply.get("cursor"), dict):
+        batch = cursor.get("firstBatch", cursor.get("nextBatch", ()))
+        return len(batch)
+    n = reply.get("n", 0)
+    return n if isinstance(n, int) else 0
+
+
+pool_metrics = ConnectionPoolMetrics()
+command_tracer = CommandTracer()
@@ -1,15 +1,52 @@
+from typing import Any, List, Optional
+
 from motor.motor_asyncio import AsyncIOMotorClient
 from odmantic import AIOEngine
 
 from app.core.config import settings
+from app.db.monitoring import command_tracer, pool_metrics
+
+_client: Optional[AsyncIOMotorClient] = None
+_engine: Optional[AIOEngine] = None
+
+
+def _create_client() -> AsyncIOMotorClient:
+    db_conf = settings.db.dict(include={"host", "port", "username", "password"})
+    event_listeners: List[Any] = [pool_metrics]
+    if settings.REQUEST_TRACING_ENABLED:
+        event_listeners.append(command_tracer)
+    return AsyncIOMotorClient(
+        **db_conf,
+        authSource=settings.db.database,
+        # https://pymongo.readthedocs.io/en/stable/examples/datetimes.html#reading-time
+        tz_aware=True,
+        **settings.db.client_options,
+        event_listeners=event_listeners,
+    )
+
+
+def get_engine() -> AIOEngine:
+    """The engine of this process, around a client created on first use.
+
+    The app creates it in its startup hook (``connect``), scripts on their
+    first query; importing this module creates nothing.
+    """
+    global _client, _engine
+    if _engine is None:
+        _client = _create_client()
+        _engine = AIOEngine(client=_client, database=settings.db.database)
+    return _engine
+
 
-db_conf = settings.db.dict(include={"host", "port", "username", "password"})
+async def connect() -> None:
+    """Create the client, reach the server once so a misconfiguration fails
+    the startup, and let the pool fill up to ``min_pool_size`` before the
+    first request."""
+    await get_engine().client.admin.command("ping")
 
-client = AsyncIOMotorClient(
-    **db_conf,
-    authSource=settings.db.database,
-    # https://pymongo.readthedocs.io/en/stable/examples/datetimes.html#reading-time
-    tz_aware=True,
-)
 
-engine = AIOEngine(client=client, database=settings.db.database)
+def close() -> None:
+    global _client, _engine
+    if _client is not None:
+        _client.close()
+    _client = _engine = None
@@ -1,12 +1,12 @@
 from app.db.init_db import init_db
-from app.db.session import engine
+from app.db.session import get_engine
 from app.utilities.logging import get_logger
 
 logger = get_logger(__name__)
 
 
 async def init() -> None:
-    async with engine.session() as session:
+    async with get_engine().session() as session:
         await init_db(session)
 
 
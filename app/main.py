@@ -1,13 +1,29 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.api_v1.api import api_router
+from app.core import security
 from app.core.config import settings
+from app.core.metrics import MetricsMiddleware, RequestMetrics, stats_collector
+from app.core.profiler import TaskNamingMiddleware, profiler
+from app.core.ratelimit import RateLimited, retry_after_header
+from app.core.security import password_hash_pool
+from app.core.tracing import TracingMiddleware
+from app.core.workers import WorkerPoolFull
+from app.crud import item as crud_item
+from app.crud.pagination import InvalidCursor
+from app.db import session
+from app.db.indexes import ensure_indexes
+from app.db.monitoring import pool_metrics
+from app.utilities.logging import get_logger
+
+logger = get_logger(__name__)
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
-    debug=True,
+    debug=settings.DEBUG,
 )
 
 # Set all CORS enabled origins
@@ -18,12 +34,146 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[
+            "X-Next-Cursor",
+            "X-Total-Count",
+            "Server-Timing",
+            "ETag",
+            "Retry-After",
+        ],
+    )
+
+if settings.REQUEST_TRACING_ENABLED:
+    app.add_middleware(
+        TracingMiddleware, slow_threshold=settings.SLOW_REQUEST_THRESHOLD_MS / 1000
+    )
+
+if settings.PROFILER_ENABLED:
+    app.add_middleware(TaskNamingMiddleware, profiler=profiler)
+
+if settings.METRICS_ENABLED:
+    # added last: outermost, so the latency covers the other middlewares
+    request_metrics = RequestMetrics()
+    request_metrics.add_collector(
+        stats_collector(
+            "password_hash_pool",
+            "Password hashing worker pool.",
+            password_hash_pool.stats,
+        )
+    )
+    request_metrics.add_collector(
+        stats_collector(
+            "auth_principal_cache",
+            "Authenticated principal cache.",
+            security.principal_cache.stats,
+        )
+    )
+    request_metrics.add_collector(
+        stats_collector(
+            "rate_limit",
+            "Rate limit token buckets.",
+            security.rate_limits.stats,
+            dict_label="limit",
+        )
+    )
+    request_metrics.add_collector(
+        stats_collector(
+            "mongo_connection_pool",
+            "MongoDB client connection pool.",
+            pool_metrics.stats,
+            dict_label="reason",
+        )
     )
+    if crud_item.coalescer is not None:
+        request_metrics.add_collector(
+            stats_collector(
+                "item_insert_coalescer",
+                "Grouped item inserts.",
+                crud_item.coalescer.stats,
+            )
+        )
+    app.add_middleware(MetricsMiddleware, metrics=request_metrics)
+
+    @app.get(settings.METRICS_PATH, include_in_schema=False)
+    def metrics() -> PlainTextResponse:
+        return PlainTextResponse(
+            request_metrics.render(), media_type="text/plain; version=0.0.4"
+        )
+
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
+
+@app.exception_handler(WorkerPoolFull)
+async def worker_pool_full_handler(request: Request, exc: WorkerPoolFull):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, try again later"},
+        headers={"Retry-After": "1"},
+    )
+
+
+@app.exception_handler(RateLimited)
+async def rate_limited_handler(request: Request, exc: RateLimited):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many requests, try again later"},
+        headers={"Retry-After": retry_after_header(exc.retry_after)},
+    )
+
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+
+@app.on_event("startup")
+def warm_up() -> None:
+    # lazily imported modules, loaded before the first request instead of in it
+    security.warm_up()
+
+
+@app.on_event("startup")
+async def connect_db() -> None:
+    await session.connect()
+
+
+@app.on_event("startup")
+async def apply_indexes() -> None:
+    if settings.db.ensure_indexes_on_startup:
+        await ensure_indexes(session.get_engine())
+
+
+@app.on_event("startup")
+async def start_rate_limit_eviction() -> None:
+    security.rate_limits.start_eviction()
+
+
+@app.on_event("shutdown")
+async def stop_rate_limit_eviction() -> None:
+    await security.rate_limits.stop_eviction()
+
+
+@app.on_event("shutdown")
+async def flush_item_inserts() -> None:
+    if crud_item.coalescer is not None:
+        await crud_item.coalescer.flush_all()
+
+
+@app.on_event("shutdown")
+def shutdown_worker_pools() -> None:
+    password_hash_pool.shutdown()
+
+
+@app.on_event("shutdown")
+def close_db() -> None:
+    logger.info(f"mongo connection pool: {pool_metrics.stats()}")
+    session.close()
+
+
 if __name__ == "__main__":
-    # debugging mode
+    # single process development server; production: python -m app.server
     import uvicorn
 
-    uvicorn.run(app, host="172.30.64.1", port=8080, log_level="debug")
+    host, _, port = settings.DEV_BIND.rpartition(":")
+    uvicorn.run(app, host=host, port=int(port), log_level="debug")
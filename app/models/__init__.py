@@ -1,2 +1,3 @@
 from .item import Item
+from .item_stats import ItemStats
 from .user import User
@@ -1,6 +1,7 @@
 from typing import Optional
 
-from odmantic import Model, Reference
+import pymongo
+from odmantic import Index, Model, Reference
 
 from .user import User  # noqa: F401
 
@@ -9,6 +10,19 @@ class Item(Model):
     title: str
     description: Optional[str]
     owner: User = Reference()
+    # incremented by every update; documents written before it existed read 0
+    version: int = 0
 
     class Config:
         collection = "item"
+
+        @staticmethod
+        def indexes():
+            # get_multi_by_owner: filter on owner, sorted by _id
+            yield Index(Item.owner, Item.id, name="owner_id")
+            # /items/search; a collection has at most one text index
+            yield pymongo.IndexModel(
+                [("title", pymongo.TEXT), ("description", pymongo.TEXT)],
+                weights={"title": 3, "description": 1},
+                name="title_description_text",
+            )
@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Optional
+
+from odmantic import Field, Model, ObjectId
+
+
+class ItemStats(Model):
+    """Item statistics of one owner, kept current by ``crud.item``."""
+
+    owner: ObjectId = Field(primary_field=True)
+    item_count: int = 0
+    last_created_at: Optional[datetime] = None
+    last_removed_at: Optional[datetime] = None
+    # set by crud.item_stats.rebuild
+    rebuilt_at: Optional[datetime] = None
+
+    class Config:
+        collection = "item_stats"
@@ -1,14 +1,24 @@
 from typing import Optional
 
-from odmantic import Model
+from odmantic import Index, Model
 
 # if TYPE_CHECKING:
 #     from .item import Item  # noqa: F401
 
 
 class User(Model):
-    name: Optional[str]
     email: str
-    password: str
-    phone: str
+    hashed_password: str
+    full_name: Optional[str] = None
+    phone: Optional[str] = None
+    is_active: bool = True
+    is_superuser: bool = False
+    # bumped to revoke every token issued so far, see crud.user.revoke_tokens
+    token_version: int = 0
     # items = relationship("Item", back_populates="owner")
+
+    class Config:
+        @staticmethod
+        def indexes():
+            # login and registration look users up by email
+            yield Index(User.email, unique=True, name="email_unique")
@@ -1,4 +1,6 @@
-from .item import Item, ItemCreate, ItemInDB, ItemUpdate
+from .bulk import BulkItemResult, BulkResult
+from .item import Item, ItemBulkCreate, ItemBulkDelete, ItemCreate, ItemInDB, ItemUpdate
+from .item_stats import ItemStats
 from .msg import Msg
-from .token import Token, TokenPayload
+from .token import RefreshToken, Token, TokenPayload, TokenUser
 from .user import User, UserCreate, UserInDB, UserUpdate
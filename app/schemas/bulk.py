@@ -0,0 +1,17 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class BulkItemResult(BaseModel):
+    # position of the element in the request
+    index: int
+    id: Optional[str] = None
+    ok: bool
+    error: Optional[str] = None
+
+
+class BulkResult(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[BulkItemResult]
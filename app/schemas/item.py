@@ -1,8 +1,10 @@
-from typing import Optional
+from typing import List, Optional
 
 from odmantic import ObjectId
 from pydantic import BaseModel, Field, validator
 
+from app.core.config import settings
+
 from .user import UserInDB
 
 
@@ -22,11 +24,19 @@ class ItemUpdate(ItemBase):
     pass
 
 
+# Properties to receive on bulk creation / deletion
+class ItemBulkCreate(BaseModel):
+    items: List[ItemCreate] = Field(..., max_items=settings.ITEMS_BULK_MAX_SIZE)
+
+
+class ItemBulkDelete(BaseModel):
+    ids: List[ObjectId] = Field(..., max_items=settings.ITEMS_BULK_MAX_SIZE)
+
+
 # Properties shared by models stored in DB
 class ItemInDBBase(ItemBase):
     id: Optional[str] = None
     title: str
-    owner: UserInDB
 
     @validator("id", pre=True, allow_reuse=True)
     def object_id2str(cls, v):
@@ -36,14 +46,29 @@ class ItemInDBBase(ItemBase):
         orm_mode = True
 
 
+# Only the owner's id is needed to build responses
+class ItemOwner(BaseModel):
+    id: ObjectId
+
+    class Config:
+        orm_mode = True
+
+
 # Properties to return to client
 class Item(ItemInDBBase):
     # workaround: owner_id from owner; use owner_id:str to replace owner:dict
-    owner: UserInDB = Field(exclude=True)
+    # lean reads pass owner_id directly and leave owner unset
+    owner: Optional[ItemOwner] = Field(None, exclude=True)
     owner_id: str = ''
+    # for the ETag, not part of the body
+    version: int = Field(0, exclude=True)
 
     @validator("owner_id", always=True)
     def populate_owner_id(cls, v, values):
+        if v:
+            return v
+        if values.get("owner") is None:
+            raise ValueError("either owner or owner_id is required")
         return str(values["owner"].id)
 
     class Config:
@@ -52,4 +77,4 @@ class Item(ItemInDBBase):
 
 # Properties stored in DB
 class ItemInDB(ItemInDBBase):
-    pass
+    owner: UserInDB
@@ -0,0 +1,11 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class ItemStats(BaseModel):
+    owner_id: str
+    item_count: int = 0
+    last_created_at: Optional[datetime] = None
+    last_removed_at: Optional[datetime] = None
@@ -7,7 +7,26 @@ from pydantic import BaseModel
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
 
 
 class TokenPayload(BaseModel):
     sub: Optional[ObjectId] = None
+    exp: Optional[int] = None
+    # "access" or "refresh"; tokens issued before the claims existed have none
+    type: Optional[str] = None
+    # token version of the user at issue time, see crud.user.revoke_tokens
+    ver: Optional[int] = None
+    is_active: Optional[bool] = None
+    is_superuser: Optional[bool] = None
+
+
+class RefreshToken(BaseModel):
+    refresh_token: str
+
+
+# The user as described by the claims of an access token
+class TokenUser(BaseModel):
+    id: ObjectId
+    is_active: bool
+    is_superuser: bool
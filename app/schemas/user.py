@@ -13,7 +13,8 @@ class UserBase(BaseModel):
 
 # Properties to receive via API on creation
 class UserCreate(UserBase):
-    phone: str
+    password: str
+    phone: Optional[str] = None
 
 
 # Properties to receive via API on update
@@ -0,0 +1,139 @@
+"""Production server: gunicorn managing uvicorn workers.
+
+    $ python -m app.server                  # settings from config.yaml / env
+    $ python -m app.server --print-config   # the gunicorn config, then exit
+"""
+import argparse
+import importlib.util
+import math
+import os
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import uvicorn.workers
+from gunicorn.app.base import BaseApplication
+
+from app.core.config import Settings, settings
+
+CGROUP_ROOT = Path("/sys/fs/cgroup")
+
+
+def _read(path: Path) -> Optional[str]:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def cgroup_cpu_limit(root: Path = CGROUP_ROOT) -> Optional[float]:
+    """CPUs allowed by the cgroup quota (docker ``--cpus``), None if unlimited."""
+    # cgroup v2: "<quota> <period>" or "max <period>"
+    if (cpu_max := _read(root / "cpu.max")) is not None:
+        quota, _, period = cpu_max.partition(" ")
+        if quota == "max":
+            return None
+        return int(quota) / int(period)
+    # cgroup v1: a quota of -1 is no limit
+    v1_quota = _read(root / "cpu" / "cpu.cfs_quota_us")
+    v1_period = _read(root / "cpu" / "cpu.cfs_period_us")
+    if v1_quota is None or v1_period is None or int(v1_quota) <= 0:
+        return None
+    return int(v1_quota) / int(v1_period)
+
+
+def available_cpus(root: Path = CGROUP_ROOT) -> float:
+    """CPUs this process may use: its affinity mask, capped by the cgroup quota."""
+    try:
+        cpus: float = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    if (limit := cgroup_cpu_limit(root)) is not None:
+        cpus = min(cpus, limit)
+    return cpus
+
+
+def worker_count(conf: Settings, cpus: float) -> int:
+    if conf.WEB_CONCURRENCY:
+        return conf.WEB_CONCURRENCY
+    # at least 2, so a worker being recycled never leaves nobody serving
+    workers = max(2, math.ceil(cpus * conf.WORKERS_PER_CORE))
+    if conf.MAX_WORKERS:
+        workers = min(workers, conf.MAX_WORKERS)
+    return workers
+
+
+def _has_module(name: str) -> bool:
+    return importlib.util.find_spec(name) is not None
+
+
+def uvicorn_config_kwargs() -> Dict[str, str]:
+    # uvloop and httptools are C implementations, both part of uvicorn[standard]
+    return {
+        "loop": "uvloop" if _has_module("uvloop") else "asyncio",
+        "http": "httptools" if _has_module("httptools") else "h11",
+    }
+
+
+def gunicorn_options(conf: Settings, cpus: Optional[float] = None) -> Dict[str, Any]:
+    options = {
+        "bind": conf.BIND,
+        "workers": worker_count(conf, available_cpus() if cpus is None else cpus),
+        "worker_class": "app.server.UvicornWorker",
+        "preload_app": conf.PRELOAD_APP,
+        "timeout": conf.WORKER_TIMEOUT,
+        "graceful_timeout": conf.GRACEFUL_TIMEOUT,
+        "keepalive": conf.KEEPALIVE,
+        "max_requests": conf.MAX_REQUESTS,
+        "max_requests_jitter": conf.MAX_REQUESTS_JITTER,
+        "loglevel": "debug" if conf.DEBUG else "info",
+        "accesslog": "-" if conf.DEBUG else None,
+        "errorlog": "-",
+    }
+    # worker heartbeats are files: keep them off a (possibly overlay) disk
+    if Path("/dev/shm").is_dir():
+        options["worker_tmp_dir"] = "/dev/shm"
+    return options
+
+
+class UvicornWorker(uvicorn.workers.UvicornWorker):
+    CONFIG_KWARGS = uvicorn_config_kwargs()
+
+
+def run(options: Dict[str, Any]) -> None:
+    class Application(BaseApplication):
+        def load_config(self) -> None:
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self) -> Any:
+            from app.main import app
+
+            return app
+
+    Application().run()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bind", help=f"override BIND ({settings.BIND})")
+    parser.add_argument("--workers", type=int, help="override the worker count")
+    parser.add_argument(
+        "--print-config", action="store_true", help="print the options and exit"
+    )
+    args = parser.parse_args()
+
+    options = gunicorn_options(settings)
+    if args.bind:
+        options["bind"] = args.bind
+    if args.workers:
+        options["workers"] = args.workers
+    if args.print_config:
+        print(f"uvicorn: {uvicorn_config_kwargs()}")
+        for key, value in options.items():
+            print(f"{key}: {value}")
+        return
+    run(options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+import csv
+import io
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, Sequence
+
+Row = Dict[str, Any]
+
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+async def _batched(
+    docs: AsyncIterable[Dict[str, Any]], batch_size: int
+) -> AsyncIterator[list]:
+    batch = []
+    async for doc in docs:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def ndjson_chunks(
+    docs: AsyncIterable[Dict[str, Any]],
+    to_row: Callable[[Dict[str, Any]], Row],
+    batch_size: int,
+) -> AsyncIterator[bytes]:
+    """One JSON object per line, flushed every ``batch_size`` documents."""
+    async for batch in _batched(docs, batch_size):
+        yield "".join(
+            json.dumps(to_row(doc), separators=(",", ":")) + "\n" for doc in batch
+        ).encode()
+
+
+async def csv_chunks(
+    docs: AsyncIterable[Dict[str, Any]],
+    to_row: Callable[[Dict[str, Any]], Row],
+    fieldnames: Sequence[str],
+    batch_size: int,
+) -> AsyncIterator[bytes]:
+    """CSV with a header line, flushed every ``batch_size`` documents."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+    writer.writeheader()
+    yield buffer.getvalue().encode()
+    async for batch in _batched(docs, batch_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(to_row(doc) for doc in batch)
+        yield buffer.getvalue().encode()
+
+
+def export_chunks(
+    format: str,
+    docs: AsyncIterable[Dict[str, Any]],
+    to_row: Callable[[Dict[str, Any]], Row],
+    fieldnames: Sequence[str],
+    batch_size: int,
+) -> AsyncIterator[bytes]:
+    if format == "csv":
+        return csv_chunks(docs, to_row, fieldnames, batch_size)
+    return ndjson_chunks(docs, to_row, batch_size)
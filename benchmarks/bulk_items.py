@@ -0,0 +1,103 @@
+"""Item ingest throughput: one ``POST /items/`` per item vs ``POST /items/bulk``.
+
+Run against a live server::
+
+    python -m benchmarks.bulk_items --base-url http://localhost:7080 --items 5000
+
+Everything created is deleted again through ``DELETE /items/bulk``. Start
+the server with ``ITEMS_WRITE_COALESCING=true`` to see concurrent single
+inserts grouped into ``insert_many`` calls.
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+import httpx
+
+
+async def _token(client: httpx.AsyncClient, api: str, email: str, password: str):
+    r = await client.post(
+        f"{api}/login/access-token", data={"username": email, "password": password}
+    )
+    r.raise_for_status()
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+async def _single(
+    client: httpx.AsyncClient, api: str, headers: dict, count: int, concurrency: int
+) -> List[str]:
+    ids: List[str] = []
+    queue = iter(range(count))
+
+    async def worker() -> None:
+        for i in queue:
+            r = await client.post(
+                f"{api}/items/",
+                headers=headers,
+                json={"title": f"bench-single-{i}", "description": "bench"},
+            )
+            r.raise_for_status()
+            ids.append(r.json()["id"])
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return ids
+
+
+async def _bulk(
+    client: httpx.AsyncClient, api: str, headers: dict, count: int, batch: int
+) -> List[str]:
+    ids: List[str] = []
+    for start in range(0, count, batch):
+        items = [
+            {"title": f"bench-bulk-{i}", "description": "bench"}
+            for i in range(start, min(count, start + batch))
+        ]
+        r = await client.post(
+            f"{api}/items/bulk", headers=headers, json={"items": items}
+        )
+        r.raise_for_status()
+        ids.extend(res["id"] for res in r.json()["results"] if res["ok"])
+    return ids
+
+
+async def run(args: argparse.Namespace) -> None:
+    api = f"{args.base_url.rstrip('/')}{args.api_prefix}"
+    async with httpx.AsyncClient(timeout=120) as client:
+        headers = await _token(client, api, args.email, args.password)
+        for name, create in (
+            (
+                "single",
+                lambda: _single(client, api, headers, args.items, args.concurrency),
+            ),
+            ("bulk", lambda: _bulk(client, api, headers, args.items, args.batch)),
+        ):
+            start = time.perf_counter()
+            ids = await create()
+            elapsed = time.perf_counter() - start
+            print(
+                f"{name:<8} {len(ids)} items in {elapsed:.2f}s = {len(ids) / elapsed:,.0f} items/s"
+            )
+            for i in range(0, len(ids), args.batch):
+                await client.request(
+                    "DELETE",
+                    f"{api}/items/bulk",
+                    headers=headers,
+                    json={"ids": ids[i : i + args.batch]},
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:7080")
+    parser.add_argument("--api-prefix", default="/api/v1")
+    parser.add_argument("--email", default="admin@localhost.com")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--items", type=int, default=5_000)
+    parser.add_argument("--batch", type=int, default=1_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Cost of deep pages: ``skip`` paging vs keyset (cursor) paging.
+
+Seeds ``--items`` documents into the item collection (owned by the first
+superuser), then times fetching one page at increasing depths::
+
+    python -m benchmarks.deep_pagination --items 1000000 --limit 100
+
+The seeded documents are removed afterwards unless ``--keep`` is given.
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+from odmantic import ObjectId
+
+from app import crud
+from app.core.config import settings
+from app.crud import pagination
+from app.db.session import get_engine
+from app.models import Item
+from benchmarks.utils import format_summary, summarize
+
+_MARKER = "bench-deep-pagination"
+
+
+async def _seed(count: int, owner_id: ObjectId) -> List[ObjectId]:
+    collection = get_engine().get_collection(Item)
+    ids: List[ObjectId] = []
+    batch = 10_000
+    for start in range(0, count, batch):
+        docs = [
+            {"title": f"{_MARKER}-{i}", "description": _MARKER, "owner": owner_id}
+            for i in range(start, min(count, start + batch))
+        ]
+        result = await collection.insert_many(docs, ordered=False)
+        ids.extend(result.inserted_ids)
+    return sorted(ids)
+
+
+async def run(args: argparse.Namespace) -> None:
+    async with get_engine().session() as db:
+        owner = await crud.user.get_by_email(db, email=settings.FIRST_SUPERUSER)
+        assert owner, "run app/initial_data.py first"
+        ids = await _seed(args.items, owner.id)
+        query = Item.description == _MARKER
+        try:
+            depths = [0] + [d for d in args.depths if d < len(ids) - args.limit]
+            results: Dict[str, List[float]] = {}
+            for depth in depths:
+                cursor = (
+                    pagination.encode_cursor("_id", ids[depth - 1], ids[depth - 1])
+                    if depth
+                    else ""
+                )
+                for mode in ("skip", "cursor"):
+                    samples = results.setdefault(f"{mode:<6} @ {depth}", [])
+                    for _ in range(args.repeat):
+                        start = time.perf_counter()
+                        if mode == "skip":
+                            page = await crud.item.get_multi(
+                                db, query, skip=depth, limit=args.limit
+                            )
+                        else:
+                            page = await crud.item.get_multi(
+                                db, query, cursor=cursor, limit=args.limit
+                            )
+                        samples.append(time.perf_counter() - start)
+                        assert page[0].id == ids[depth]
+            for name, samples in results.items():
+                print(format_summary(name, summarize(samples)))
+        finally:
+            if not args.keep:
+                await get_engine().get_collection(Item).delete_many(
+                    {"description": _MARKER}
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=200_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--depths",
+        type=int,
+        nargs="+",
+        default=[1_000, 10_000, 100_000, 500_000, 900_000],
+    )
+    parser.add_argument("--keep", action="store_true")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
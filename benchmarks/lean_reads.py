@@ -0,0 +1,67 @@
+"""Item list reads with and without resolving the owner Reference.
+
+Times ``crud.item.get_multi`` plus building the ``schemas.Item`` response
+objects, full (``$lookup`` on the owner) versus ``get_multi_lean``::
+
+    python -m benchmarks.lean_reads --items 10000 --limit 100
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List
+
+from app import crud, schemas
+from app.core.config import settings
+from app.db.session import get_engine
+from app.models import Item
+from benchmarks.utils import format_summary, summarize
+
+_MARKER = "bench-lean-reads"
+
+
+async def run(args: argparse.Namespace) -> None:
+    async with get_engine().session() as db:
+        owner = await crud.user.get_by_email(db, email=settings.FIRST_SUPERUSER)
+        assert owner, "run app/initial_data.py first"
+        await get_engine().get_collection(Item).insert_many(
+            [
+                {"title": f"{_MARKER}-{i}", "description": _MARKER, "owner": owner.id}
+                for i in range(args.items)
+            ]
+        )
+        query = Item.description == _MARKER
+        try:
+            results: Dict[str, List[float]] = {"full": [], "lean": []}
+            for _ in range(args.repeat):
+                for mode, samples in results.items():
+                    start = time.perf_counter()
+                    if mode == "lean":
+                        items: List[Any] = await crud.item.get_multi_lean(
+                            db, query, limit=args.limit
+                        )
+                    else:
+                        items = await crud.item.get_multi(db, query, limit=args.limit)
+                    [schemas.Item.from_orm(item) for item in items]
+                    samples.append(time.perf_counter() - start)
+            for mode, samples in results.items():
+                print(
+                    format_summary(
+                        f"{mode} get_multi({args.limit})", summarize(samples)
+                    )
+                )
+        finally:
+            await get_engine().get_collection(Item).delete_many(
+                {"description": _MARKER}
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10_000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
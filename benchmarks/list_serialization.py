@@ -0,0 +1,71 @@
+"""CPU cost of rendering item list responses, no database involved.
+
+Compares FastAPI's ``response_model`` path (``from_orm`` validation,
+``jsonable_encoder``, stdlib ``json``) with ``app.api.responses``
+(precompiled getters + orjson), and checks both produce the same bytes::
+
+    python -m benchmarks.list_serialization --items 100
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Callable, Dict, List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app import models, schemas
+from app.api.responses import item_serializer
+from benchmarks.utils import format_summary, summarize
+
+
+def _items(count: int, lean: bool) -> List[Any]:
+    owner = models.User(email="owner@example.com", hashed_password="x")
+    if lean:
+        return [
+            schemas.Item(
+                id=str(i), title=f"item-{i}", description="x" * 64, owner_id="o"
+            )
+            for i in range(count)
+        ]
+    return [
+        models.Item(title=f"item-{i}", description="x" * 64, owner=owner)
+        for i in range(count)
+    ]
+
+
+async def run(args: argparse.Namespace) -> None:
+    field = create_response_field(name="response", type_=List[schemas.Item])
+
+    async def response_model(items: List[Any]) -> bytes:
+        content = await serialize_response(field=field, response_content=items)
+        return JSONResponse(content).body
+
+    async def fast(items: List[Any]) -> bytes:
+        return item_serializer.response(items).body
+
+    paths: Dict[str, Callable] = {"response_model": response_model, "fast": fast}
+    for lean in (False, True):
+        items = _items(args.items, lean)
+        bodies = {name: await render(items) for name, render in paths.items()}
+        assert bodies["response_model"] == bodies["fast"], "outputs differ"
+        for name, render in paths.items():
+            samples = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                await render(items)
+                samples.append(time.perf_counter() - start)
+            label = f"{name} ({'lean' if lean else 'odmantic'} x{args.items})"
+            print(format_summary(label, summarize(samples)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=500)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
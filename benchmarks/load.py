@@ -0,0 +1,337 @@
+"""Load test of ``app.main.app``: concurrent virtual users, in process.
+
+Requests go through an ASGI transport (no server, no sockets), so the
+numbers cover routing, auth, validation, the database round trips and
+serialization. Every virtual user logs in, then picks requests from a
+weighted mix of login, users and items endpoints until ``--duration`` is
+up. The database is either an in-memory stand-in (``mongomock-motor``, from
+requirements_dev.txt: app overhead only, no network) or a real mongod::
+
+    python -m benchmarks.load --users 50 --duration 30
+    python -m benchmarks.load --mongo --database fastapi_benchmark
+
+Store a run, then compare later runs against it; the exit status is 1 when
+a route regressed by more than ``--tolerance``::
+
+    python -m benchmarks.load --save-baseline load-baseline.json
+    python -m benchmarks.load --baseline load-baseline.json --tolerance 0.2
+
+Baselines are only comparable on the same machine and backend.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Callable, Dict, List, Tuple
+
+import httpx
+
+from benchmarks.utils import format_summary, summarize
+
+PASSWORD = "benchmark-password"
+
+# route label -> weight in the request mix
+MIX = {
+    "POST /login/access-token": 1,
+    "GET /users/me": 4,
+    "GET /users/{user_id}": 1,
+    "GET /items/": 4,
+    "GET /items/{id}": 6,
+    "POST /items/": 2,
+    "PUT /items/{id}": 1,
+}
+
+# route label -> {"count", "errors", "rps", "p50", "p95", "p99", ...}
+Results = Dict[str, Dict[str, float]]
+
+
+class _NoSession:
+    """Stand-in for a motor client session, which mongomock does not have.
+
+    Falsy: mongomock only rejects the ``session`` argument when it is truthy
+    (``if session:``). That is an implementation detail, hence the exact
+    mongomock and mongomock-motor pins of requirements_dev.txt.
+    """
+
+    def __bool__(self) -> bool:
+        return False
+
+    async def __aenter__(self) -> "_NoSession":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        pass
+
+    async def end_session(self) -> None:
+        pass
+
+
+def in_memory_engine(database: str) -> Any:
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("the in-memory backend needs mongomock-motor: pip install it")
+    from odmantic import AIOEngine
+
+    class InMemoryClient(AsyncMongoMockClient):
+        # odmantic opens a session around every save, and the app per request
+        async def start_session(self, **kwargs: Any) -> _NoSession:
+            return _NoSession()
+
+    return AIOEngine(client=InMemoryClient(), database=database)
+
+
+def mongo_engine(database: str) -> Any:
+    from motor.motor_asyncio import AsyncIOMotorClient
+    from odmantic import AIOEngine
+
+    from app.core.config import settings
+
+    client = AsyncIOMotorClient(settings.db.uri, **settings.db.client_options)
+    return AIOEngine(client=client, database=database)
+
+
+@asynccontextmanager
+async def use_engine(engine: Any) -> AsyncIterator[None]:
+    """Route the app's database dependencies to ``engine``."""
+    from app.api import deps
+    from app.main import app
+
+    async def get_db() -> AsyncIterator[Any]:
+        async with engine.session() as session:
+            yield session
+
+    overrides = {
+        deps.get_engine: lambda: engine,
+        deps.get_db: get_db,
+        # no transactions: mongomock has none and a bare mongod neither
+        deps.get_transaction: get_db,
+    }
+    app.dependency_overrides.update(overrides)
+    try:
+        yield
+    finally:
+        for dependency in overrides:
+            app.dependency_overrides.pop(dependency, None)
+
+
+async def seed(engine: Any, users: int, items_per_user: int) -> List[str]:
+    """Create the virtual users and their items; returns their emails."""
+    from app import crud, schemas
+
+    emails = []
+    for i in range(users):
+        email = f"load-{i}@example.com"
+        user = await crud.user.get_by_email(engine, email=email)
+        if user is None:
+            user_in = schemas.UserCreate(email=email, password=PASSWORD)
+            user = await crud.user.create(engine, obj_in=user_in)
+        items = [
+            schemas.ItemCreate(title=f"item {n}", description="load test")
+            for n in range(items_per_user)
+        ]
+        await crud.item.create_many_with_owner(engine, objs_in=items, owner_id=user.id)
+        emails.append(email)
+    return emails
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, api: str, email: str):
+        self.client = client
+        self.api = api
+        self.email = email
+        self.headers: Dict[str, str] = {}
+        self.user_id = ""
+        self.item_ids: List[str] = []
+
+    async def login(self) -> httpx.Response:
+        r = await self.client.post(
+            f"{self.api}/login/access-token",
+            data={"username": self.email, "password": PASSWORD},
+        )
+        if r.status_code == 200:
+            self.headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        return r
+
+    async def start(self) -> None:
+        (await self.login()).raise_for_status()
+        r = await self.client.get(f"{self.api}/users/me", headers=self.headers)
+        self.user_id = r.json()["id"]
+        r = await self.client.get(f"{self.api}/items/", headers=self.headers)
+        self.item_ids = [item["id"] for item in r.json()]
+
+    def requests(self) -> Dict[str, Callable[[], Any]]:
+        api, client, headers = self.api, self.client, self.headers
+        return {
+            "POST /login/access-token": self.login,
+            "GET /users/me": lambda: client.get(f"{api}/users/me", headers=headers),
+            "GET /users/{user_id}": lambda: client.get(
+                f"{api}/users/{self.user_id}", headers=headers
+            ),
+            "GET /items/": lambda: client.get(
+                f"{api}/items/", params={"limit": 20}, headers=headers
+            ),
+            "GET /items/{id}": lambda: client.get(
+                f"{api}/items/{random.choice(self.item_ids)}", headers=headers
+            ),
+            "POST /items/": self.create_item,
+            "PUT /items/{id}": lambda: client.put(
+                f"{api}/items/{random.choice(self.item_ids)}",
+                json={"description": f"updated {time.time()}"},
+                headers=headers,
+            ),
+        }
+
+    async def create_item(self) -> httpx.Response:
+        r = await self.client.post(
+            f"{self.api}/items/",
+            json={"title": "load", "description": "created"},
+            headers=self.headers,
+        )
+        if r.status_code == 200:
+            self.item_ids.append(r.json()["id"])
+        return r
+
+    async def run(
+        self,
+        deadline: float,
+        samples: Dict[str, List[float]],
+        errors: Dict[str, int],
+    ) -> None:
+        requests = self.requests()
+        labels, weights = zip(*MIX.items())
+        while time.perf_counter() < deadline:
+            (label,) = random.choices(labels, weights)
+            if not self.item_ids and "{id}" in label:
+                continue
+            start = time.perf_counter()
+            r = await requests[label]()
+            samples[label].append(time.perf_counter() - start)
+            if r.status_code >= 400:
+                errors[label] += 1
+            # a login replaces the token the other requests send
+            if label == "POST /login/access-token":
+                requests = self.requests()
+
+
+async def run_load(
+    app: Any, api: str, emails: List[str], duration: float
+) -> Tuple[Results, float]:
+    samples: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        users = [VirtualUser(client, api, email) for email in emails]
+        await asyncio.gather(*(user.start() for user in users))
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(user.run(deadline, samples, errors) for user in users))
+        elapsed = time.perf_counter() - start
+    results: Results = {}
+    for label in MIX:
+        summary = summarize(samples[label])
+        summary["errors"] = errors[label]
+        summary["rps"] = len(samples[label]) / elapsed
+        results[label] = summary
+    return results, elapsed
+
+
+def compare(
+    results: Results, baseline: Results, tolerance: float
+) -> List[Tuple[str, str]]:
+    """``(route, reason)`` of every route worse than ``baseline``."""
+    regressions = []
+    for label, base in baseline.items():
+        if (current := results.get(label)) is None or not current["count"]:
+            continue
+        for key in ("p50", "p95", "p99"):
+            if current[key] > base[key] * (1 + tolerance):
+                regressions.append(
+                    (label, f"{key} {base[key]:.2f}ms -> {current[key]:.2f}ms")
+                )
+        if current["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(
+                (label, f"rps {base['rps']:.1f} -> {current['rps']:.1f}")
+            )
+    return regressions
+
+
+def report(results: Results, elapsed: float) -> None:
+    for label, summary in results.items():
+        print(
+            format_summary(label, summary)
+            + f" rps={summary['rps']:8.1f} errors={summary['errors']}"
+        )
+    total = sum(summary["count"] for summary in results.values())
+    print(f"{total} requests in {elapsed:.1f}s: {total / elapsed:.1f} req/s")
+
+
+async def run(args: argparse.Namespace) -> int:
+    from app.core.config import settings
+    from app.main import app
+
+    if args.mongo:
+        engine = mongo_engine(args.database)
+    else:
+        engine = in_memory_engine(args.database)
+    emails = await seed(engine, args.users, args.items_per_user)
+    async with use_engine(engine):
+        results, elapsed = await run_load(
+            app, settings.API_V1_STR, emails, args.duration
+        )
+    if args.mongo and args.drop:
+        await engine.client.drop_database(args.database)
+
+    report(results, elapsed)
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(results, indent=2))
+        print(f"baseline written to {args.save_baseline}")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        regressions = compare(results, baseline, args.tolerance)
+        for label, reason in regressions:
+            print(f"REGRESSION {label}: {reason}")
+        if regressions:
+            return 1
+        print(f"no regression beyond {args.tolerance:.0%} of {args.baseline}")
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20, help="virtual users")
+    parser.add_argument("--items-per-user", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10, help="seconds")
+    parser.add_argument(
+        "--mongo", action="store_true", help="use the mongod of the app settings"
+    )
+    parser.add_argument("--database", default="fastapi_benchmark")
+    parser.add_argument(
+        "--keep", dest="drop", action="store_false", help="keep the mongod data"
+    )
+    parser.add_argument("--baseline", help="compare with this stored run")
+    parser.add_argument("--save-baseline", help="store this run")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument(
+        "--rate-limits",
+        action="store_true",
+        help="keep the login rate limits (every virtual user shares one address)",
+    )
+    args = parser.parse_args()
+    if not args.rate_limits:
+        # read when app.core.security is first imported
+        os.environ["LOGIN_RATE_LIMIT_PER_IP"] = ""
+        os.environ["LOGIN_RATE_LIMIT_PER_USERNAME"] = ""
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""p99 latency of ``GET /users/me`` while logins hammer the same worker.
+
+Run against a live server (single worker makes the effect obvious)::
+
+    python -m benchmarks.login_contention --base-url http://localhost:7080 \
+        --email admin@localhost.com --password admin
+
+With bcrypt on the event loop every login stalls ``/users/me`` for the whole
+hash; with the worker pool only the login requests themselves wait.
+"""
+import argparse
+import asyncio
+import time
+from typing import List
+
+import httpx
+
+from benchmarks.utils import format_summary, summarize, timed
+
+
+async def _login(client: httpx.AsyncClient, api: str, email: str, password: str):
+    r = await client.post(
+        f"{api}/login/access-token", data={"username": email, "password": password}
+    )
+    r.raise_for_status()
+    return r.json()["access_token"]
+
+
+async def _reader(
+    client: httpx.AsyncClient, api: str, token: str, deadline: float, samples: list
+) -> None:
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.perf_counter() < deadline:
+        with timed(samples):
+            r = await client.get(f"{api}/users/me", headers=headers)
+        r.raise_for_status()
+
+
+async def _logger_in(
+    client: httpx.AsyncClient,
+    api: str,
+    email: str,
+    password: str,
+    deadline: float,
+    samples: list,
+) -> None:
+    while time.perf_counter() < deadline:
+        with timed(samples):
+            await client.post(
+                f"{api}/login/access-token",
+                data={"username": email, "password": password},
+            )
+
+
+async def run(args: argparse.Namespace) -> None:
+    api = f"{args.base_url.rstrip('/')}{args.api_prefix}"
+    limits = httpx.Limits(max_connections=args.readers + args.logins + 1)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        token = await _login(client, api, args.email, args.password)
+
+        for phase, logins in (("baseline", 0), ("with-logins", args.logins)):
+            me: List[float] = []
+            login: List[float] = []
+            deadline = time.perf_counter() + args.duration
+            await asyncio.gather(
+                *(
+                    _reader(client, api, token, deadline, me)
+                    for _ in range(args.readers)
+                ),
+                *(
+                    _logger_in(client, api, args.email, args.password, deadline, login)
+                    for _ in range(logins)
+                ),
+            )
+            print(format_summary(f"[{phase}] GET /users/me", summarize(me)))
+            if login:
+                print(format_summary(f"[{phase}] POST /login", summarize(login)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:7080")
+    parser.add_argument("--api-prefix", default="/api/v1")
+    parser.add_argument("--email", default="admin@localhost.com")
+    parser.add_argument("--password", default="admin")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--logins", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Per-request cost of ``MetricsMiddleware``.
+
+Drives a trivial in-process app (no server, no database) with and without
+the middleware, so the difference is the middleware itself::
+
+    python -m benchmarks.metrics_overhead --requests 20000
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, Dict, List
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.metrics import MetricsMiddleware, RequestMetrics
+from benchmarks.utils import format_summary, summarize
+
+
+def _app(with_metrics: bool) -> FastAPI:
+    app = FastAPI()
+    if with_metrics:
+        app.add_middleware(MetricsMiddleware, metrics=RequestMetrics())
+
+    @app.get("/items/{id}")
+    async def read_item(id: int) -> Dict[str, int]:
+        return {"id": id}
+
+    return app
+
+
+async def run(args: argparse.Namespace) -> None:
+    apps: Dict[str, Any] = {
+        "without": _app(with_metrics=False),
+        "with": _app(with_metrics=True),
+    }
+    results: Dict[str, List[float]] = {name: [] for name in apps}
+    clients = {
+        name: httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://bench"
+        )
+        for name, app in apps.items()
+    }
+    try:
+        # interleaved, so drift (GC, CPU frequency) hits both sides alike
+        for i in range(args.warmup + args.requests):
+            for name, client in clients.items():
+                start = time.perf_counter()
+                await client.get(f"/items/{i}")
+                if i >= args.warmup:
+                    results[name].append(time.perf_counter() - start)
+    finally:
+        for client in clients.values():
+            await client.aclose()
+    for name, samples in results.items():
+        print(format_summary(f"{name} metrics", summarize(samples)))
+    overhead = summarize(results["with"])["p50"] - summarize(results["without"])["p50"]
+    print(f"p50 overhead per request: {overhead * 1000:.1f}µs")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--warmup", type=int, default=1_000)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
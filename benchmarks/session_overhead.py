@@ -0,0 +1,64 @@
+"""Concurrent point reads through a client session versus the bare engine.
+
+Each request of ``--concurrency`` parallel workers does a ``crud.user.get``
+either inside its own ``engine.session()`` (what ``deps.get_db`` gives an
+endpoint) or straight on the engine (``deps.get_engine``)::
+
+    python -m benchmarks.session_overhead --requests 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict, List
+
+from app import crud
+from app.core.config import settings
+from app.db.session import get_engine
+from benchmarks.utils import format_summary, summarize
+
+
+async def _with_session(user_id) -> None:
+    async with get_engine().session() as db:
+        await crud.user.get(db, id=user_id)
+
+
+async def _with_engine(user_id) -> None:
+    await crud.user.get(get_engine(), id=user_id)
+
+
+async def _drive(read, user_id, requests: int, concurrency: int) -> List[float]:
+    samples: List[float] = []
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        for _ in remaining:
+            start = time.perf_counter()
+            await read(user_id)
+            samples.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return samples
+
+
+async def run(args: argparse.Namespace) -> None:
+    user = await crud.user.get_by_email(get_engine(), email=settings.FIRST_SUPERUSER)
+    assert user, "run app/initial_data.py first"
+    modes = {"session": _with_session, "engine": _with_engine}
+    results: Dict[str, List[float]] = {}
+    for mode, read in modes.items():
+        start = time.perf_counter()
+        results[mode] = await _drive(read, user.id, args.requests, args.concurrency)
+        elapsed = time.perf_counter() - start
+        print(format_summary(f"{mode} get", summarize(results[mode])))
+        print(f"{'':<32} throughput={args.requests / elapsed:8.0f} req/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5_000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
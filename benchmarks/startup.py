@@ -0,0 +1,94 @@
+"""Cold start cost: module import times and time to the first response.
+
+Every measurement runs in a fresh interpreter, with settings composed by
+Hydra and loaded from a snapshot (``SETTINGS_SNAPSHOT``)::
+
+    python -m benchmarks.startup --top 15 --repeat 5
+
+Time to first response covers interpreter start, ``import app.main``, the
+lazily imported modules and one in-process ``GET --path`` (no server and
+no database: pick a path that does not hit MongoDB).
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import SNAPSHOT_ENV, write_snapshot
+from benchmarks.utils import format_summary, summarize
+
+_FIRST_REQUEST = """
+import asyncio, httpx
+from app.main import app
+from app.core import security
+security.warm_up()
+
+async def get():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        (await client.get({path!r})).raise_for_status()
+
+asyncio.run(get())
+"""
+
+
+def _env(snapshot: Optional[Path]) -> Dict[str, str]:
+    env = dict(os.environ)
+    env.pop(SNAPSHOT_ENV, None)
+    if snapshot is not None:
+        env[SNAPSHOT_ENV] = str(snapshot)
+    return env
+
+
+def import_times(snapshot: Optional[Path]) -> List[Tuple[str, int]]:
+    """``(module, cumulative µs)`` of ``import app.main``, slowest first."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=_env(snapshot),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:") :].split("|")
+        times.append((module.strip(), int(cumulative)))
+    return sorted(times, key=lambda t: t[1], reverse=True)
+
+
+def first_response(snapshot: Optional[Path], path: str) -> float:
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "-c", _FIRST_REQUEST.format(path=path)],
+        env=_env(snapshot),
+        check=True,
+    )
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--path", default="/docs")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = Path(tmp) / "settings.json"
+        write_snapshot(snapshot)
+        for name, source in (("hydra", None), ("snapshot", snapshot)):
+            print(f"== settings from {name}")
+            for module, cumulative in import_times(source)[: args.top]:
+                print(f"{module:<48} {cumulative / 1000:8.1f}ms")
+            samples = [first_response(source, args.path) for _ in range(args.repeat)]
+            print(format_summary("time to first response", summarize(samples)))
+
+
+if __name__ == "__main__":
+    main()
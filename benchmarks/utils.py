@@ -0,0 +1,43 @@
+import statistics
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile, ``pct`` in [0, 100]."""
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def summarize(samples: Sequence[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    return {
+        "count": len(samples),
+        "mean": statistics.fmean(samples) * 1000 if samples else float("nan"),
+        "p50": percentile(samples, 50) * 1000,
+        "p95": percentile(samples, 95) * 1000,
+        "p99": percentile(samples, 99) * 1000,
+        "max": max(samples) * 1000 if samples else float("nan"),
+    }
+
+
+def format_summary(name: str, summary: Dict[str, float]) -> str:
+    return (
+        f"{name:<32} n={summary['count']:<6} "
+        f"mean={summary['mean']:8.2f}ms p50={summary['p50']:8.2f}ms "
+        f"p95={summary['p95']:8.2f}ms p99={summary['p99']:8.2f}ms "
+        f"max={summary['max']:8.2f}ms"
+    )
+
+
+@contextmanager
+def timed(samples: List[float]) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        samples.append(time.perf_counter() - start)
@@ -0,0 +1,18 @@
+from fastapi import Response
+
+from app.api.counts import set_total_count, total_counts
+
+
+async def test_total_count_is_cached():
+    total_counts.clear()
+    calls = []
+
+    async def count() -> int:
+        calls.append(1)
+        return 42
+
+    for _ in range(3):
+        response = Response()
+        await set_total_count(response, ("item", None), count)
+        assert response.headers["X-Total-Count"] == "42"
+    assert len(calls) == 1
@@ -0,0 +1,39 @@
+import pytest
+from fastapi import HTTPException
+from odmantic import ObjectId
+
+from app.api import deps
+from app.core import security
+
+
+def access_token(user_id: ObjectId, version: int = 0, **claims) -> str:
+    claims = {"ver": version, "is_active": True, "is_superuser": False, **claims}
+    return security.create_access_token(user_id, claims=claims)
+
+
+async def test_token_user_from_claims():
+    user_id = ObjectId()
+    # no database is needed: the flags come from the token
+    user = await deps.get_token_user(db=None, token=access_token(user_id))
+    assert (user.id, user.is_active, user.is_superuser) == (user_id, True, False)
+
+    with pytest.raises(HTTPException) as exc_info:
+        await deps.get_superuser_token_user(user)
+    assert exc_info.value.status_code == 400
+
+
+async def test_refresh_token_is_not_an_access_token():
+    token = security.create_refresh_token(ObjectId(), version=0)
+    with pytest.raises(HTTPException) as exc_info:
+        await deps.get_token_user(db=None, token=token)
+    assert exc_info.value.status_code == 403
+    assert deps.decode_token(token, type="refresh").ver == 0
+
+
+async def test_revoked_tokens_are_rejected():
+    user_id = ObjectId()
+    old, new = access_token(user_id, version=0), access_token(user_id, version=1)
+    security.revoke_tokens(user_id, 1)
+    with pytest.raises(HTTPException):
+        await deps.get_token_user(db=None, token=old)
+    assert (await deps.get_token_user(db=None, token=new)).id == user_id
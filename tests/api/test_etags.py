@@ -0,0 +1,17 @@
+from app.api.etags import content_etag, item_etag, none_match, parse_item_etag
+
+
+def test_item_etag_round_trip():
+    etag = item_etag("abc", 3)
+    assert parse_item_etag(etag, "abc") == 3
+    assert parse_item_etag(etag, "other") is None
+    assert parse_item_etag('"abc-x"', "abc") is None
+
+
+def test_none_match():
+    etag = content_etag(b"{}")
+    assert none_match(etag, etag)
+    assert none_match(f'"other", W/{etag}', etag)
+    assert none_match("*", etag)
+    assert not none_match('"other"', etag)
+    assert not none_match(None, etag)
@@ -0,0 +1,44 @@
+from typing import Any, List
+
+import pytest
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app import models, schemas
+from app.api.responses import item_serializer, user_serializer
+
+
+async def _fastapi_body(response_model: Any, content: Any) -> bytes:
+    field = create_response_field(name="response", type_=response_model)
+    return JSONResponse(
+        await serialize_response(field=field, response_content=content)
+    ).body
+
+
+@pytest.fixture
+def owner() -> models.User:
+    return models.User(email="owner@example.com", hashed_password="x")
+
+
+@pytest.fixture
+def items(owner: models.User) -> list:
+    full = models.Item(title="full", description="ünïcode", owner=owner)
+    lean = schemas.Item(title="lean", description=None, id="1", owner_id="2")
+    return [full, lean]
+
+
+async def test_item_serializer_matches_response_model(items: list):
+    assert item_serializer.response(items).body == await _fastapi_body(
+        List[schemas.Item], items
+    )
+    for item in items:
+        assert item_serializer.response(item).body == await _fastapi_body(
+            schemas.Item, item
+        )
+
+
+async def test_user_serializer_matches_response_model(owner: models.User):
+    assert user_serializer.response(owner).body == await _fastapi_body(
+        schemas.User, owner
+    )
@@ -62,6 +62,53 @@ class TestRetrieveItems:
             assert item["description"] == expected[i]["description"]
             assert item["owner_id"] == superuser_id
 
+    async def test_retrieve_items_by_cursor(
+        self,
+        client: AsyncClient,
+        superuser_token_headers: dict,
+        init_items: list[dict],
+    ):
+        seen: list[dict] = []
+        cursor = ""
+        while cursor is not None:
+            resp = await client.get(
+                self.url,
+                headers=superuser_token_headers,
+                params={"cursor": cursor, "limit": 1},
+            )
+            assert resp.status_code == 200, resp.json()
+            seen.extend(resp.json())
+            cursor = resp.headers.get("X-Next-Cursor")
+        assert sorted(item["title"] for item in seen) == sorted(
+            item["title"] for item in init_items
+        )
+
+    async def test_total_count(
+        self,
+        client: AsyncClient,
+        superuser_token_headers: dict,
+        init_items: list[dict],
+    ):
+        from app.api.counts import total_counts
+
+        total_counts.clear()
+        resp = await client.get(
+            self.url,
+            headers=superuser_token_headers,
+            params={"limit": 1, "total": True},
+        )
+        assert resp.status_code == 200, resp.json()
+        assert len(resp.json()) == 1
+        assert resp.headers["X-Total-Count"] == str(len(init_items))
+
+    async def test_invalid_cursor(
+        self, client: AsyncClient, superuser_token_headers: dict
+    ):
+        resp = await client.get(
+            self.url, headers=superuser_token_headers, params={"cursor": "!"}
+        )
+        assert resp.status_code == 400, resp.json()
+
 
 async def test_create_item(
     client: AsyncClient, db: AIOSession, superuser_token_headers: dict
@@ -132,3 +179,202 @@ async def test_delete_item(
         if item_read:
             await crud.item.remove(db, id=item_read.id)
         await crud.user.remove(db, id=item.owner.id)
+
+
+async def test_retrieve_items_normal_user(
+    client: AsyncClient, normal_user_token_headers: dict, db: AIOSession
+) -> None:
+    owner = await crud.user.get_by_email(db, email=settings.EMAIL_TEST_USER)
+    assert owner
+    mine = await create_random_item(db, owner=owner)
+    other = await create_random_item(db)
+
+    try:
+        response = await client.get(
+            f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers
+        )
+        assert response.status_code == 200, response.json()
+        ids = {item["id"] for item in response.json()}
+        assert str(mine.id) in ids
+        assert str(other.id) not in ids
+    finally:
+        await crud.item.remove(db, id=mine.id)
+        await crud.item.remove(db, id=other.id)
+        await crud.user.remove(db, id=other.owner.id)
+
+
+async def test_update_item(
+    client: AsyncClient, superuser_token_headers: dict, db: AIOSession
+) -> None:
+    item = await create_random_item(db)
+
+    try:
+        response = await client.put(
+            f"{settings.API_V1_STR}/items/{item.id}",
+            headers=superuser_token_headers,
+            json={"title": "updated"},
+        )
+        assert response.status_code == 200, response.json()
+        content = response.json()
+        assert content["title"] == "updated"
+        assert content["description"] == item.description
+        assert content["owner_id"] == str(item.owner.id)
+    finally:
+        await crud.item.remove(db, id=item.id)
+        await crud.user.remove(db, id=item.owner.id)
+
+
+async def test_conditional_read_and_update(
+    client: AsyncClient, superuser_token_headers: dict, db: AIOSession
+) -> None:
+    item = await create_random_item(db)
+    url = f"{settings.API_V1_STR}/items/{item.id}"
+
+    try:
+        response = await client.get(url, headers=superuser_token_headers)
+        assert response.status_code == 200, response.json()
+        etag = response.headers["ETag"]
+
+        response = await client.get(
+            url, headers={**superuser_token_headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+
+        response = await client.put(
+            url,
+            headers={**superuser_token_headers, "If-Match": etag},
+            json={"title": "updated"},
+        )
+        assert response.status_code == 200, response.json()
+        assert response.headers["ETag"] != etag
+
+        # the first update consumed that version
+        response = await client.put(
+            url,
+            headers={**superuser_token_headers, "If-Match": etag},
+            json={"title": "lost update"},
+        )
+        assert response.status_code == 412, response.json()
+
+        response = await client.get(
+            url, headers={**superuser_token_headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 200, response.json()
+        assert response.json()["title"] == "updated"
+    finally:
+        await crud.item.remove(db, id=item.id)
+        await crud.user.remove(db, id=item.owner.id)
+
+
+async def test_delete_item_not_owner(
+    client: AsyncClient, normal_user_token_headers: dict, db: AIOSession
+) -> None:
+    item = await create_random_item(db)
+
+    try:
+        response = await client.delete(
+            f"{settings.API_V1_STR}/items/{item.id}",
+            headers=normal_user_token_headers,
+        )
+        assert response.status_code == 400, response.json()
+        assert await crud.item.get(db, id=item.id)
+
+        response = await client.delete(
+            f"{settings.API_V1_STR}/items/{ObjectId()}",
+            headers=normal_user_token_headers,
+        )
+        assert response.status_code == 404, response.json()
+    finally:
+        await crud.item.remove(db, id=item.id)
+        await crud.user.remove(db, id=item.owner.id)
+
+
+async def test_bulk_create_and_delete(
+    client: AsyncClient, superuser_token_headers: dict
+) -> None:
+    data = {"items": [{"title": f"bulk-{i}", "description": "bulk"} for i in range(3)]}
+    response = await client.post(
+        f"{settings.API_V1_STR}/items/bulk", headers=superuser_token_headers, json=data
+    )
+    assert response.status_code == 200, response.json()
+    content = response.json()
+    assert content["succeeded"] == 3
+    assert content["failed"] == 0
+    ids = [result["id"] for result in content["results"]]
+
+    missing = str(ObjectId())
+    response = await client.request(
+        "DELETE",
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=superuser_token_headers,
+        json={"ids": ids + [missing, ids[0]]},
+    )
+    assert response.status_code == 200, response.json()
+    content = response.json()
+    assert content["succeeded"] == 3
+    assert content["failed"] == 2
+    assert content["results"][3:] == [
+        {"index": 3, "id": missing, "ok": False, "error": "Item not found"},
+        {"index": 4, "id": ids[0], "ok": False, "error": "Duplicate id"},
+    ]
+
+
+async def test_export_items(
+    client: AsyncClient, superuser_token_headers: dict, init_items: list[dict]
+) -> None:
+    import json
+
+    response = await client.get(
+        f"{settings.API_V1_STR}/items/export",
+        headers=superuser_token_headers,
+        params={"batch_size": 1},
+    )
+    assert response.status_code == 200, response.text
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(row["title"] for row in rows) == sorted(
+        item["title"] for item in init_items
+    )
+    assert set(rows[0]) == {"id", "title", "description", "owner_id"}
+
+
+async def test_search_items(
+    client: AsyncClient, normal_user_token_headers: dict, db: AIOSession
+) -> None:
+    from app.db.indexes import ensure_indexes
+
+    await ensure_indexes(db.engine)
+    owner = await crud.user.get_by_email(db, email=settings.EMAIL_TEST_USER)
+    assert owner
+    mine = [
+        await crud.item.create_with_owner(
+            db, obj_in=ItemCreate(title=title, description=description), owner=owner
+        )
+        for title, description in (
+            ("kettle", "a kettle for kettle corn"),
+            ("teapot", "not a kettle"),
+            ("teacup", "porcelain"),
+        )
+    ]
+    other = await create_random_item(db)
+    other = await crud.item.update(db, db_obj=other, obj_in={"title": "kettle"})
+
+    try:
+        seen: list[dict] = []
+        cursor = ""
+        while cursor is not None:
+            response = await client.get(
+                f"{settings.API_V1_STR}/items/search",
+                headers=normal_user_token_headers,
+                params={"q": "kettle", "limit": 1, "cursor": cursor},
+            )
+            assert response.status_code == 200, response.json()
+            seen.extend(response.json())
+            cursor = response.headers.get("X-Next-Cursor")
+        # most relevant first, other owners' items never show up
+        assert [item["id"] for item in seen] == [str(mine[0].id), str(mine[1].id)]
+    finally:
+        for item in mine:
+            await crud.item.remove(db, id=item.id)
+        await crud.item.remove(db, id=other.id)
+        await crud.user.remove(db, id=other.owner.id)
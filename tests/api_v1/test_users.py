@@ -128,3 +128,57 @@ async def test_retrieve_users(
     assert len(all_users) > 1
     for item in all_users:
         assert "email" in item
+
+
+async def test_update_user_me_partial(
+    client: AsyncClient, normal_user_token_headers: Dict[str, str], db: AIOSession
+) -> None:
+    before = await crud.user.get_by_email(db, email=settings.EMAIL_TEST_USER)
+    assert before
+    full_name = random_lower_string()
+    r = await client.put(
+        f"{settings.API_V1_STR}/users/me",
+        headers=normal_user_token_headers,
+        json={"full_name": full_name},
+    )
+    assert r.status_code == 200, r.json()
+    assert r.json()["full_name"] == full_name
+
+    after = await crud.user.get_by_email(db, email=settings.EMAIL_TEST_USER)
+    assert after
+    assert after.full_name == full_name
+    # the password was not sent, so it must not have been re-hashed
+    assert after.hashed_password == before.hashed_password
+
+
+async def test_read_user_stats(
+    client: AsyncClient, normal_user_token_headers: dict, db: AIOSession
+) -> None:
+    from app.schemas import ItemCreate
+
+    owner = await crud.user.get_by_email(db, email=settings.EMAIL_TEST_USER)
+    assert owner
+    url = f"{settings.API_V1_STR}/users/{owner.id}/stats"
+
+    r = await client.get(url, headers=normal_user_token_headers)
+    assert r.status_code == 200, r.json()
+    before = r.json()["item_count"]
+    item = await crud.item.create_with_owner(
+        db, obj_in=ItemCreate(title="counted"), owner=owner
+    )
+    r = await client.get(url, headers=normal_user_token_headers)
+    assert r.json()["item_count"] == before + 1
+    assert r.json()["last_created_at"]
+
+    await crud.item.remove(db, id=item.id)
+    r = await client.get(url, headers=normal_user_token_headers)
+    assert r.json()["item_count"] == before
+    assert r.json()["last_removed_at"]
+
+    other = await crud.user.get_by_email(db, email=settings.FIRST_SUPERUSER)
+    assert other
+    r = await client.get(
+        f"{settings.API_V1_STR}/users/{other.id}/stats",
+        headers=normal_user_token_headers,
+    )
+    assert r.status_code == 400
@@ -6,8 +6,9 @@ import pytest
 from httpx import AsyncClient
 from odmantic.session import AIOSession
 
+from app.core import security
 from app.core.config import settings
-from app.db.session import engine
+from app.db.session import get_engine
 from app.main import app
 from app.testing.user import authentication_token_from_email
 from app.testing.utilities import get_superuser_token_headers
@@ -63,11 +64,17 @@ async def client() -> AsyncGenerator[AsyncClient, None]:
 
 @pytest.fixture(scope="session")
 async def db() -> AsyncGenerator[AIOSession, None]:
-    async with engine.session() as s:
+    async with get_engine().session() as s:
         assert s.engine.client.address == ("mongo", 27017), "MUST use testing MongoDB"
         yield s
 
 
+@pytest.fixture(autouse=True)
+def reset_rate_limits() -> None:
+    # every test logs in from the same address, often as the same user
+    security.rate_limits.clear()
+
+
 @pytest.fixture(scope="session")
 def rootdir() -> Path:
     return Path(os.getcwd())
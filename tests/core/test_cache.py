@@ -0,0 +1,50 @@
+import time
+
+from odmantic import Model
+
+from app.core.cache import PrincipalCache, TTLCache
+
+
+class _User(Model):
+    email: str
+
+
+def test_ttl_cache_lru_eviction():
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats() == {"size": 2, "hits": 2, "misses": 1, "evictions": 1}
+
+
+def test_ttl_cache_expiry():
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_principal_cache_invalidate_user():
+    cache = PrincipalCache(maxsize=10, ttl=60)
+    user = _User(email="a@example.com")
+    cache.put("t1", {"sub": str(user.id)}, user)
+    cache.put("t2", {"sub": str(user.id)}, user)
+
+    cached = cache.get("t1")
+    assert cached and cached.user == user and cached.user is not user
+
+    cache.invalidate_user(user.id)
+    assert cache.get("t1") is None
+    assert cache.get("t2") is None
+    assert cache.stats()["invalidations"] == 2
+
+
+def test_principal_cache_respects_token_expiry():
+    cache = PrincipalCache(maxsize=10, ttl=60)
+    user = _User(email="a@example.com")
+    cache.put("expired", {"exp": time.time() - 1}, user)
+    assert cache.get("expired") is None
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from app.core.coalescer import WriteCoalescer
+
+
+class Recorder:
+    def __init__(self, errors=None, fail=None):
+        self.batches = []
+        self.errors = errors or {}
+        self.fail = fail
+
+    async def __call__(self, key, items):
+        self.batches.append((key, items))
+        if self.fail:
+            raise self.fail
+        return {
+            i: self.errors[item] for i, item in enumerate(items) if item in self.errors
+        }
+
+
+async def test_concurrent_submits_share_a_flush():
+    flush = Recorder(errors={"bad": ValueError("bad")})
+    coalescer = WriteCoalescer(flush, max_delay=0.01, max_batch=100)
+    results = await asyncio.gather(
+        *(coalescer.submit("k", item) for item in ("a", "bad", "c")),
+        return_exceptions=True,
+    )
+    assert flush.batches == [("k", ["a", "bad", "c"])]
+    assert results[0] is None and results[2] is None
+    assert isinstance(results[1], ValueError)
+    assert coalescer.stats().largest_batch == 3
+
+
+async def test_full_batch_flushes_without_waiting():
+    flush = Recorder()
+    coalescer = WriteCoalescer(flush, max_delay=60, max_batch=2)
+    await asyncio.wait_for(
+        asyncio.gather(coalescer.submit("k", 1), coalescer.submit("k", 2)), 1
+    )
+    assert flush.batches == [("k", [1, 2])]
+
+
+async def test_keys_are_flushed_separately():
+    flush = Recorder()
+    coalescer = WriteCoalescer(flush, max_delay=0.001, max_batch=100)
+    await asyncio.gather(coalescer.submit("a", 1), coalescer.submit("b", 2))
+    assert sorted(flush.batches) == [("a", [1]), ("b", [2])]
+
+
+async def test_flush_failure_reaches_every_submitter():
+    flush = Recorder(fail=ConnectionError("down"))
+    coalescer = WriteCoalescer(flush, max_delay=0.001, max_batch=100)
+    results = await asyncio.gather(
+        coalescer.submit("k", 1), coalescer.submit("k", 2), return_exceptions=True
+    )
+    assert all(isinstance(result, ConnectionError) for result in results)
+
+
+async def test_cancelled_flush_releases_submitters():
+    started = asyncio.Event()
+
+    async def hang(key, items):
+        started.set()
+        await asyncio.sleep(60)
+
+    coalescer = WriteCoalescer(hang, max_delay=60, max_batch=1)
+    submit = asyncio.create_task(coalescer.submit("k", 1))
+    await started.wait()
+    for flush in list(coalescer._flushes):
+        flush.cancel()
+    done, _ = await asyncio.wait([submit], timeout=1)
+    assert done and submit.cancelled()
+
+
+async def test_flush_all():
+    flush = Recorder()
+    coalescer = WriteCoalescer(flush, max_delay=60, max_batch=100)
+    submit = asyncio.create_task(coalescer.submit("k", 1))
+    await asyncio.sleep(0)
+    await coalescer.flush_all()
+    await submit
+    assert flush.batches == [("k", [1])]
+    assert coalescer.stats().pending == 0
+
+
+def test_max_batch_must_be_positive():
+    with pytest.raises(ValueError):
+        WriteCoalescer(Recorder(), max_delay=0.001, max_batch=0)
@@ -0,0 +1,52 @@
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from app.core.metrics import MetricsMiddleware, RequestMetrics, stats_collector
+
+
+def make_app(metrics: RequestMetrics) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+    @app.get("/items/{id}")
+    def read_item(id: int):
+        if id < 0:
+            raise HTTPException(status_code=404)
+        return {"id": id}
+
+    return app
+
+
+async def test_labels_use_route_template():
+    metrics = RequestMetrics(buckets=(0.5,))
+    app = make_app(metrics)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        for id in (1, 2, -1):
+            await client.get(f"/items/{id}")
+        await client.get("/nowhere")
+        await client.request("BREW", "/nowhere")
+
+    text = metrics.render()
+    assert (
+        'http_requests_total{method="GET",route="/items/{id}",status="200"} 2' in text
+    )
+    assert (
+        'http_requests_total{method="GET",route="/items/{id}",status="404"} 1' in text
+    )
+    assert 'method="GET",route="<unmatched>",status="404"} 1' in text
+    assert 'method="other",route="<unmatched>",status="404"} 1' in text
+    assert (
+        'http_request_duration_seconds_bucket{method="GET",route="/items/{id}",'
+        'status="200",le="+Inf"} 2'
+    ) in text
+    assert "http_requests_in_flight 0" in text
+
+
+def test_stats_collector():
+    collect = stats_collector(
+        "pool", "A pool.", lambda: {"open": 2, "failures": {"timeout": 1}}, "reason"
+    )
+    lines = list(collect())
+    assert "pool_open 2" in lines
+    assert 'pool_failures{reason="timeout"} 1' in lines
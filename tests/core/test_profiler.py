@@ -0,0 +1,39 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.profiler import ProfilerBusy, SamplingProfiler
+
+
+def spin(seconds: float) -> None:
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+async def busy() -> None:
+    for _ in range(20):
+        spin(0.01)
+        await asyncio.sleep(0)
+
+
+async def test_samples_name_the_running_task():
+    profiler = SamplingProfiler()
+    task = asyncio.create_task(busy(), name="busy")
+    output = await profiler.profile(0.15, interval=0.001)
+    await task
+
+    stacks = dict(line.rsplit(" ", 1) for line in output.splitlines())
+    assert any(stack.startswith("task busy;") and "spin (" in stack for stack in stacks)
+    assert all(count.isdigit() for count in stacks.values())
+
+
+async def test_one_profile_at_a_time():
+    profiler = SamplingProfiler()
+    first = asyncio.create_task(profiler.profile(0.05, interval=0.01))
+    await asyncio.sleep(0)
+    with pytest.raises(ProfilerBusy):
+        await profiler.profile(0.05, interval=0.01)
+    await first
+    assert not profiler.running
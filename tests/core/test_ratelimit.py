@@ -0,0 +1,46 @@
+import time
+
+import pytest
+
+from app.core.ratelimit import RateLimited, TokenBucketLimiter, parse_limit
+
+
+def test_parse_limit():
+    limiter = parse_limit("30/minute")
+    assert (limiter.burst, limiter.rate) == (30, 0.5)
+    with pytest.raises(ValueError):
+        parse_limit("30/fortnight")
+
+
+def test_burst_then_reject_with_retry_after():
+    limiter = TokenBucketLimiter(rate=1, burst=2)
+    limiter.acquire("1.2.3.4")
+    limiter.acquire("1.2.3.4")
+    with pytest.raises(RateLimited) as exc_info:
+        limiter.acquire("1.2.3.4")
+    assert 0 < exc_info.value.retry_after <= 1
+    # other keys have their own bucket
+    limiter.acquire("5.6.7.8")
+    assert limiter.rejected == 1
+
+
+def test_evict_refilled_buckets():
+    limiter = TokenBucketLimiter(rate=1000, burst=1, shards=1)
+    limiter.acquire("a")
+    time.sleep(0.01)
+    assert limiter.evict_expired(0) == 1
+    assert len(limiter) == 0
+
+
+def test_max_keys_per_shard():
+    limiter = TokenBucketLimiter(rate=1, burst=1, shards=1, max_keys_per_shard=3)
+    for key in range(3):
+        limiter.acquire(key)
+    # a full shard evicts nothing: key 0 keeps its drained bucket
+    limiter.acquire("new")
+    with pytest.raises(RateLimited):
+        limiter.acquire(0)
+    # keys beyond capacity share one bucket, drained by "new"
+    with pytest.raises(RateLimited):
+        limiter.acquire("other")
+    assert len(limiter) == 3
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+from app import server
+from app.core.config import settings
+
+
+def test_cgroup_v2_cpu_limit(tmp_path: Path):
+    (tmp_path / "cpu.max").write_text("150000 100000\n")
+    assert server.cgroup_cpu_limit(tmp_path) == 1.5
+    (tmp_path / "cpu.max").write_text("max 100000\n")
+    assert server.cgroup_cpu_limit(tmp_path) is None
+
+
+def test_cgroup_v1_cpu_limit(tmp_path: Path):
+    (tmp_path / "cpu").mkdir()
+    (tmp_path / "cpu" / "cpu.cfs_period_us").write_text("100000\n")
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("-1\n")
+    assert server.cgroup_cpu_limit(tmp_path) is None
+    (tmp_path / "cpu" / "cpu.cfs_quota_us").write_text("300000\n")
+    assert server.cgroup_cpu_limit(tmp_path) == 3
+    assert server.available_cpus(tmp_path) <= 3
+
+
+def test_worker_count():
+    conf = settings.copy(
+        update={"WEB_CONCURRENCY": None, "WORKERS_PER_CORE": 1, "MAX_WORKERS": 6}
+    )
+    assert server.worker_count(conf, cpus=0.5) == 2
+    assert server.worker_count(conf, cpus=2.5) == 3
+    assert server.worker_count(conf, cpus=32) == 6
+    conf = conf.copy(update={"WEB_CONCURRENCY": 9})
+    assert server.worker_count(conf, cpus=2) == 9
+
+
+def test_gunicorn_options():
+    options = server.gunicorn_options(settings, cpus=4)
+    assert options["worker_class"] == "app.server.UvicornWorker"
+    assert options["workers"] == server.worker_count(settings, 4)
+    assert options["max_requests_jitter"] == settings.MAX_REQUESTS_JITTER
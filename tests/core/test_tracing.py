@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+import httpx
+from fastapi import FastAPI
+from pymongo import monitoring
+
+from app.core.tracing import RequestTrace, TracingMiddleware, current_trace, span
+from app.db.monitoring import CommandTracer
+
+ADDRESS = ("localhost", 27017)
+
+
+def run_find(tracer: CommandTracer, request_id: int) -> None:
+    command = {"find": "item", "filter": {}}
+    tracer.started(
+        monitoring.CommandStartedEvent(command, "db", request_id, ADDRESS, None)
+    )
+    reply = {"cursor": {"firstBatch": [{"title": "x"}], "id": 0}, "ok": 1}
+    tracer.succeeded(
+        monitoring.CommandSucceededEvent(
+            timedelta(milliseconds=3), reply, "find", request_id, ADDRESS, None
+        )
+    )
+
+
+def test_command_tracer_records_current_request_only():
+    tracer = CommandTracer()
+    run_find(tracer, 1)  # outside of any request: ignored
+
+    trace = RequestTrace()
+    token = current_trace.set(trace)
+    try:
+        run_find(tracer, 2)
+    finally:
+        current_trace.reset(token)
+
+    [command] = trace.commands
+    assert (command.name, command.target) == ("find", "item")
+    assert command.seconds == 0.003
+    assert command.documents == 1
+    assert not trace.pending
+
+
+async def test_server_timing_header():
+    app = FastAPI()
+    app.add_middleware(TracingMiddleware, slow_threshold=60)
+
+    @app.get("/")
+    def index():
+        with span("auth"):
+            pass
+        return {}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        response = await client.get("/")
+
+    timing = response.headers["Server-Timing"]
+    assert timing.startswith('db;dur=0.0;desc="0 commands", auth;dur=')
+    assert "total;dur=" in timing
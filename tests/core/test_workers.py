@@ -0,0 +1,34 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.workers import BoundedWorkerPool, WorkerPoolFull
+
+
+async def test_run_off_loop():
+    pool = BoundedWorkerPool(max_workers=2, queue_size=0)
+    try:
+        assert await pool.run(sum, [1, 2, 3]) == 6
+        stats = pool.stats()
+        assert stats.completed == 1
+        assert stats.in_flight == 0
+    finally:
+        pool.shutdown()
+
+
+async def test_reject_when_queue_full():
+    pool = BoundedWorkerPool(max_workers=1, queue_size=1)
+    try:
+        jobs = [asyncio.ensure_future(pool.run(time.sleep, 0.1)) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert pool.stats().queue_depth == 1
+        with pytest.raises(WorkerPoolFull):
+            await pool.run(time.sleep, 0.1)
+        await asyncio.gather(*jobs)
+        stats = pool.stats()
+        assert stats.rejected == 1
+        assert stats.completed == 2
+        assert stats.wait_seconds_max > 0
+    finally:
+        pool.shutdown()
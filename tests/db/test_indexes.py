@@ -0,0 +1,18 @@
+from app import models
+from app.db.indexes import _index_spec, declared_indexes
+
+
+def test_text_index_matches_server_spec():
+    declared = declared_indexes(models.Item)["title_description_text"]
+    # as reported by index_information()
+    existing = {
+        "v": 2,
+        "key": [("_fts", "text"), ("_ftsx", 1)],
+        "weights": {"title": 3, "description": 1},
+        "default_language": "english",
+        "language_override": "language",
+        "textIndexVersion": 3,
+    }
+    assert _index_spec(declared.document) == _index_spec(existing)
+    existing["weights"] = {"title": 1, "description": 1}
+    assert _index_spec(declared.document) != _index_spec(existing)
@@ -0,0 +1,34 @@
+from pymongo import monitoring
+
+from app.db.monitoring import ConnectionPoolMetrics
+
+ADDRESS = ("localhost", 27017)
+
+
+def test_checkout_counters():
+    metrics = ConnectionPoolMetrics()
+    metrics.connection_created(monitoring.ConnectionCreatedEvent(ADDRESS, 1))
+    metrics.connection_check_out_started(
+        monitoring.ConnectionCheckOutStartedEvent(ADDRESS)
+    )
+    metrics.connection_checked_out(monitoring.ConnectionCheckedOutEvent(ADDRESS, 1))
+    stats = metrics.stats()
+    assert (stats.open, stats.checked_out, stats.checkouts) == (1, 1, 1)
+    assert stats.wait_seconds_total >= 0
+
+    metrics.connection_checked_in(monitoring.ConnectionCheckedInEvent(ADDRESS, 1))
+    assert metrics.stats().checked_out == 0
+
+
+def test_checkout_failures_by_reason():
+    metrics = ConnectionPoolMetrics()
+    for _ in range(2):
+        metrics.connection_check_out_started(
+            monitoring.ConnectionCheckOutStartedEvent(ADDRESS)
+        )
+        metrics.connection_check_out_failed(
+            monitoring.ConnectionCheckOutFailedEvent(ADDRESS, "timeout")
+        )
+    stats = metrics.stats()
+    assert stats.checkout_failures == {"timeout": 2}
+    assert stats.checkouts == 0